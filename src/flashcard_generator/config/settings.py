@@ -5,12 +5,47 @@ Centralizes all configuration settings to replace hardcoded values throughout
 the application and enable easy customization.
 """
 
-from dataclasses import dataclass, field
-from typing import List, Dict, Any
+from dataclasses import asdict, dataclass, field, fields
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from pathlib import Path
-import json
 import os
 
+from ..utils import serialization
+
+
+def _to_bool(value: str) -> bool:
+    """Interpret an environment variable value as a boolean flag."""
+    return value.lower() in ('true', '1', 'yes', 'on')
+
+
+# Environment variable -> (Config attribute, converter from the raw string)
+_ENV_MAP: Dict[str, Tuple[str, Callable[[str], Any]]] = {
+    'FLASHCARD_AI_MODEL': ('AI_MODEL_NAME', str),
+    'FLASHCARD_ANSWER_MODEL': ('AI_ANSWER_MODEL_NAME', str),
+    'FLASHCARD_SPACY_MODEL': ('SPACY_MODEL_NAME', str),
+    'FLASHCARD_LOG_LEVEL': ('LOG_LEVEL', str),
+    'FLASHCARD_MAX_FILE_SIZE': ('MAX_FILE_SIZE_MB', int),
+    'FLASHCARD_OCR_THRESHOLD': ('OCR_CONFIDENCE_THRESHOLD', float),
+    'FLASHCARD_OCR_CONCURRENCY': ('OCR_MAX_WORKERS', int),
+    'FLASHCARD_OCR_BATCH_SIZE': ('OCR_BATCH_SIZE', int),
+    'FLASHCARD_OCR_DPI': ('OCR_RENDER_DPI', int),
+    'FLASHCARD_PDF_MARGIN': ('PDF_MARGIN_RATIO', float),
+    'FLASHCARD_PDF_WORKERS': ('PDF_MAX_WORKERS', int),
+    'FLASHCARD_TARGET_WORDS': ('TARGET_WORDS_PER_CHUNK', int),
+    'FLASHCARD_TARGET_TOKENS': ('TARGET_TOKENS_PER_CHUNK', int),
+    'FLASHCARD_AI_BATCH_SIZE': ('AI_BATCH_SIZE', int),
+    'FLASHCARD_AI_WORKERS': ('AI_NUM_WORKERS', int),
+    'FLASHCARD_AI_BACKEND': ('AI_BACKEND', str),
+    'FLASHCARD_AI_QUANTIZATION': ('AI_QUANTIZATION', str),
+    'FLASHCARD_AI_DTYPE': ('AI_TORCH_DTYPE', str),
+    'FLASHCARD_ANSWER_BEAMS': ('ANSWER_NUM_BEAMS', int),
+    'FLASHCARD_QUESTION_BEAMS': ('QUESTION_NUM_BEAMS', int),
+    'FLASHCARD_PRELOAD_MODELS': ('ENABLE_MODEL_PRELOADING', _to_bool),
+    'FLASHCARD_TORCH_COMPILE': ('ENABLE_TORCH_COMPILE', _to_bool),
+    'FLASHCARD_CACHE_DIR': ('CACHE_DIR', str),
+    'FLASHCARD_ENABLE_CACHING': ('ENABLE_CACHING', _to_bool),
+}
+
 
 @dataclass
 class Config:
@@ -19,9 +54,15 @@ class Config:
     # OCR Settings
     OCR_CONFIDENCE_THRESHOLD: float = 0.5
     OCR_DEFAULT_LANGUAGES: List[str] = field(default_factory=lambda: ['en'])
+    OCR_MAX_WORKERS: int = 0  # Concurrent OCR batches and render processes; 0 uses the CPU count (one batch at a time on CPU)
+    OCR_BATCH_SIZE: int = 8  # Same-size pages recognized per EasyOCR call
+    OCR_RENDER_DPI: int = 200  # PDF page resolution for OCR; 72 is too coarse for small print
+    PDF_MARGIN_RATIO: float = 0.05  # Text blocks entirely within this top/bottom band are dropped
+    PDF_MAX_WORKERS: int = 0  # Processes for PDF text extraction; 0 uses the CPU count
     
     # Text Processing Settings
     TARGET_WORDS_PER_CHUNK: int = 220
+    TARGET_TOKENS_PER_CHUNK: int = 256
     CHUNK_OVERLAP_RATIO: float = 0.2
     MIN_SEGMENT_LENGTH: int = 50
     MAX_CHUNK_LENGTH: int = 2000
@@ -30,18 +71,28 @@ class Config:
     MAX_SUMMARY_TOKENS: int = 200
     MAX_QUESTION_TOKENS: int = 128
     MAX_ANSWER_TOKENS: int = 48
+    ANSWER_NUM_BEAMS: int = 1  # Greedy: short extractive answers rarely gain from beams
+    QUESTION_NUM_BEAMS: int = 4  # Every beam is also returned as a question candidate
     DEFAULT_QUESTIONS_PER_SEGMENT: int = 3
+    AI_BATCH_SIZE: int = 8
+    AI_NUM_WORKERS: int = 1  # Processes for flashcard generation, each with its own model
     AI_MODEL_NAME: str = "google/flan-t5-base"
+    AI_ANSWER_MODEL_NAME: str = "google/flan-t5-small"  # Empty string reuses AI_MODEL_NAME
+    AI_BACKEND: str = "torch"  # "torch" or "onnx" (needs optimum[onnxruntime])
+    AI_QUANTIZATION: str = "none"  # "none" or "int8" (weight-only)
+    AI_TORCH_DTYPE: str = "auto"  # "auto", "bfloat16", "float16" or "float32"
     
     # SpaCy Settings
-    SPACY_MODEL_NAME: str = "en_core_web_sm"
+    SPACY_MODEL_NAME: str = "en_core_web_sm"  # "blank:en" splits with the rule-based sentencizer only
     
     # File Paths
-    FLASHCARDS_STORAGE: str = "data/flashcards.json"
+    FLASHCARDS_STORAGE: str = "data/flashcards.jsonl"  # JSON Lines, one card per line
     CONFIG_FILE: str = "flashcard_config.json"
+    CACHE_DIR: str = "~/.cache/flashcard_generator"
     
     # Performance Settings
-    ENABLE_MODEL_PRELOADING: bool = False
+    ENABLE_MODEL_PRELOADING: bool = True
+    ENABLE_TORCH_COMPILE: bool = False  # First batches pay a one-time compile cost
     ENABLE_CACHING: bool = True
     MAX_FILE_SIZE_MB: int = 100
     
@@ -59,12 +110,8 @@ class Config:
         if filepath is None:
             filepath = self.CONFIG_FILE
             
-        config_dict = {}
-        for field_name, field_def in self.__dataclass_fields__.items():
-            config_dict[field_name] = getattr(self, field_name)
-        
-        with open(filepath, 'w') as f:
-            json.dump(config_dict, f, indent=2)
+        with open(filepath, 'wb') as f:
+            f.write(serialization.dumps(asdict(self), indent=True))
     
     @classmethod
     def load_from_file(cls, filepath: str = None) -> 'Config':
@@ -72,47 +119,31 @@ class Config:
         if filepath is None:
             filepath = cls.__dataclass_fields__['CONFIG_FILE'].default
             
-        if not os.path.exists(filepath):
-            # Return default config if file doesn't exist
-            return cls()
-        
         try:
-            with open(filepath, 'r') as f:
-                config_dict = json.load(f)
+            with open(filepath, 'rb') as f:
+                config_dict = serialization.loads(f.read())
+            if not isinstance(config_dict, dict):
+                raise TypeError(f"expected a JSON object, got {type(config_dict).__name__}")
             
-            # Create config instance with loaded values
-            return cls(**config_dict)
+            # Ignore keys this version doesn't know, e.g. from a newer release
+            known_fields = {f.name for f in fields(cls)}
+            return cls(**{key: value for key, value in config_dict.items() if key in known_fields})
             
-        except (json.JSONDecodeError, TypeError) as e:
+        except FileNotFoundError:
+            # Return default config if file doesn't exist
+            return cls()
+        
+        except (serialization.JSONDecodeError, TypeError) as e:
             # Return default config if loading fails
             print(f"Warning: Could not load config from {filepath}: {e}")
             return cls()
     
     def update_from_env(self) -> None:
         """Update configuration from environment variables."""
-        env_mappings = {
-            'FLASHCARD_AI_MODEL': 'AI_MODEL_NAME',
-            'FLASHCARD_SPACY_MODEL': 'SPACY_MODEL_NAME',
-            'FLASHCARD_LOG_LEVEL': 'LOG_LEVEL',
-            'FLASHCARD_MAX_FILE_SIZE': 'MAX_FILE_SIZE_MB',
-            'FLASHCARD_OCR_THRESHOLD': 'OCR_CONFIDENCE_THRESHOLD',
-            'FLASHCARD_TARGET_WORDS': 'TARGET_WORDS_PER_CHUNK',
-        }
-        
-        for env_var, config_attr in env_mappings.items():
-            if env_var in os.environ:
-                value = os.environ[env_var]
-                
-                # Type conversion based on current attribute type
-                current_value = getattr(self, config_attr)
-                if isinstance(current_value, int):
-                    value = int(value)
-                elif isinstance(current_value, float):
-                    value = float(value)
-                elif isinstance(current_value, bool):
-                    value = value.lower() in ('true', '1', 'yes', 'on')
-                
-                setattr(self, config_attr, value)
+        for env_var, (config_attr, convert) in _ENV_MAP.items():
+            value = os.environ.get(env_var)
+            if value is not None:
+                setattr(self, config_attr, convert(value))
     
     def validate(self) -> List[str]:
         """Validate configuration values and return list of issues."""
@@ -122,18 +153,59 @@ class Config:
         if not 0.0 <= self.OCR_CONFIDENCE_THRESHOLD <= 1.0:
             issues.append("OCR_CONFIDENCE_THRESHOLD must be between 0.0 and 1.0")
         
+        if self.OCR_MAX_WORKERS < 0:
+            issues.append("OCR_MAX_WORKERS must be zero (auto) or positive")
+        
+        if self.OCR_BATCH_SIZE <= 0:
+            issues.append("OCR_BATCH_SIZE must be positive")
+        
+        if self.OCR_RENDER_DPI <= 0:
+            issues.append("OCR_RENDER_DPI must be positive")
+        
+        if not 0.0 <= self.PDF_MARGIN_RATIO < 0.5:
+            issues.append("PDF_MARGIN_RATIO must be between 0.0 and 0.5")
+        
+        if self.PDF_MAX_WORKERS < 0:
+            issues.append("PDF_MAX_WORKERS must be zero (auto) or positive")
+        
         if not 0.0 <= self.CHUNK_OVERLAP_RATIO <= 1.0:
             issues.append("CHUNK_OVERLAP_RATIO must be between 0.0 and 1.0")
         
         if self.TARGET_WORDS_PER_CHUNK <= 0:
             issues.append("TARGET_WORDS_PER_CHUNK must be positive")
         
+        if self.TARGET_TOKENS_PER_CHUNK <= 0:
+            issues.append("TARGET_TOKENS_PER_CHUNK must be positive")
+        
         if self.MIN_SEGMENT_LENGTH <= 0:
             issues.append("MIN_SEGMENT_LENGTH must be positive")
         
         if self.MAX_FILE_SIZE_MB <= 0:
             issues.append("MAX_FILE_SIZE_MB must be positive")
         
+        if self.AI_BATCH_SIZE <= 0:
+            issues.append("AI_BATCH_SIZE must be positive")
+        
+        if self.AI_NUM_WORKERS <= 0:
+            issues.append("AI_NUM_WORKERS must be positive")
+        
+        if self.ANSWER_NUM_BEAMS <= 0:
+            issues.append("ANSWER_NUM_BEAMS must be positive")
+        
+        if self.QUESTION_NUM_BEAMS <= 0:
+            issues.append("QUESTION_NUM_BEAMS must be positive")
+        
+        if self.AI_BACKEND not in ("torch", "onnx"):
+            issues.append("AI_BACKEND must be 'torch' or 'onnx'")
+        
+        if self.AI_QUANTIZATION not in ("none", "int8"):
+            issues.append("AI_QUANTIZATION must be 'none' or 'int8'")
+        elif self.AI_QUANTIZATION == "int8" and self.AI_BACKEND == "onnx":
+            issues.append("AI_QUANTIZATION 'int8' only applies to the 'torch' backend")
+        
+        if self.AI_TORCH_DTYPE not in ("auto", "bfloat16", "float16", "float32"):
+            issues.append("AI_TORCH_DTYPE must be 'auto', 'bfloat16', 'float16' or 'float32'")
+        
         # Validate file paths
         storage_dir = Path(self.FLASHCARDS_STORAGE).parent
         if storage_dir != Path('.') and not storage_dir.exists():
@@ -142,29 +214,36 @@ class Config:
         return issues
 
 
-# Global configuration instance
-config = Config()
+# Global configuration instance, loaded on first access
+_config: Optional[Config] = None
 
-# Load from file and environment on import
-config = Config.load_from_file()
-config.update_from_env()
 
-# Validate configuration
-validation_issues = config.validate()
-if validation_issues:
-    print("⚠️ Configuration validation issues:")
-    for issue in validation_issues:
-        print(f"  - {issue}")
+def _load_config() -> Config:
+    """Load configuration from file and environment, reporting validation issues."""
+    loaded = Config.load_from_file()
+    loaded.update_from_env()
+    
+    # Validate configuration
+    validation_issues = loaded.validate()
+    if validation_issues:
+        print("⚠️ Configuration validation issues:")
+        for issue in validation_issues:
+            print(f"  - {issue}")
+    
+    return loaded
 
 
 def get_config() -> Config:
-    """Get the global configuration instance."""
-    return config
+    """Get the global configuration instance, loading it on first use."""
+    global _config
+    if _config is None:
+        _config = _load_config()
+    return _config
 
 
 def update_config(**kwargs) -> None:
     """Update configuration values at runtime."""
-    global config
+    config = get_config()
     for key, value in kwargs.items():
         if hasattr(config, key.upper()):
             setattr(config, key.upper(), value)
@@ -174,5 +253,5 @@ def update_config(**kwargs) -> None:
 
 def reset_config() -> None:
     """Reset configuration to defaults."""
-    global config
-    config = Config()
+    global _config
+    _config = Config()
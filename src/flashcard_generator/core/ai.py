@@ -1,24 +1,63 @@
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import dataclasses
 import logging
-from ..utils.model_manager import get_ai_generator
+import multiprocessing
+import os
+from ..utils.cache import get_result_cache
+from ..utils.model_manager import get_ai_model
 from ..utils.patterns import AIPatterns
-from ..config.settings import get_config
+from ..config.settings import Config, get_config, update_config
 from ..utils.exceptions import AIGenerationError
 
+logger = logging.getLogger(__name__)
+
+# A prompt is (instruction, text, suffix); the text is tokenized separately so
+# segments shared by several prompts are only encoded once
+Prompt = Tuple[str, str, str]
+
+# Called with (start index, flashcards) as each group of segments finishes
+GroupCallback = Callable[[int, List[List[Dict[str, str]]]], None]
+
+# Part of every result cache key; bump it when prompts or output parsing change
+# so results cached under the old wording are not served
+_PROMPT_VERSION = 1
+
+
+def _model_cache_settings(config: Config) -> Tuple[Any, ...]:
+    """Settings besides the model name that change what a model generates."""
+    return (_PROMPT_VERSION, config.AI_BACKEND, config.AI_QUANTIZATION, config.AI_TORCH_DTYPE)
+
+
+def _flashcard_cache_settings(config: Config) -> Tuple[Any, ...]:
+    """Every setting that changes the flashcards generated for a segment."""
+    return _model_cache_settings(config) + (
+        config.AI_MODEL_NAME, config.AI_ANSWER_MODEL_NAME,
+        config.MAX_QUESTION_TOKENS, config.MAX_ANSWER_TOKENS, config.QUESTION_NUM_BEAMS, config.ANSWER_NUM_BEAMS,
+        config.MIN_QUESTION_LENGTH, config.MIN_ANSWER_WORDS, config.MAX_ANSWER_WORDS,
+    )
+
+
 def generate_summary(text: str, max_tokens: Optional[int] = None) -> str:
     """Generate and return a summary of the given text."""
     config = get_config()
-    logger = logging.getLogger(__name__)
     
     if max_tokens is None:
         max_tokens = config.MAX_SUMMARY_TOKENS
     
-    summary_prompt = f"Summarize the following text: {text}"
+    summary_prompt: Prompt = ("Summarize the following text:", text, "")
     
     try:
-        generator = get_ai_generator()
-        summary_result = generator(summary_prompt, max_new_tokens=max_tokens, truncation=True)
-        summary = summary_result[0]['generated_text']
+        summary = None
+        if config.ENABLE_CACHING:
+            cache = get_result_cache()
+            cache_key = cache.make_key(text, max_tokens, config.AI_MODEL_NAME, _model_cache_settings(config))
+            summary = cache.get("summaries", cache_key)
+        
+        if summary is None:
+            summary = _generate_texts([summary_prompt], max_new_tokens=max_tokens)[0][0]
+            if config.ENABLE_CACHING:
+                cache.set("summaries", cache_key, summary)
         
         print("--- Generated Summary ---")
         print(summary)
@@ -28,79 +67,268 @@ def generate_summary(text: str, max_tokens: Optional[int] = None) -> str:
         
     except Exception as e:
         logger.error(f"Summary generation failed: {e}")
-        raise AIGenerationError("summary", len(summary_prompt), e)
+        raise AIGenerationError("summary", sum(len(part) for part in summary_prompt), e)
 
 
 def generate_flashcards(text: str, num_questions: Optional[int] = None) -> List[Dict[str, str]]:
     """
     Generates flashcards (question-answer pairs) from a given text using optimized AI generation.
     """
+    return generate_flashcards_batch([text], num_questions)[0]
+
+
+def generate_flashcards_batch(segments: List[str], num_questions: Optional[int] = None) -> List[List[Dict[str, str]]]:
+    """
+    Generate flashcards for several segments using batched model calls.
+    
+    The question prompts of all segments are generated as one batch, followed by
+    one batch holding the answer prompts of every (segment, question) pair.
+    Segments seen before are served from the result cache when caching is
+    enabled; new results are stored as each group of segments finishes, so an
+    interrupted run resumes where it stopped. Returns one list of flashcards
+    per segment, in segment order.
+    """
     config = get_config()
-    logger = logging.getLogger(__name__)
     
     if num_questions is None:
         num_questions = config.DEFAULT_QUESTIONS_PER_SEGMENT
     
+    if not config.ENABLE_CACHING:
+        return _generate_flashcards_uncached(segments, num_questions)
+    
+    cache = get_result_cache()
+    settings = _flashcard_cache_settings(config)
+    keys = [cache.make_key(segment, num_questions, settings) for segment in segments]
+    cards_per_segment = [cache.get("flashcards", key) for key in keys]
+    missing = [i for i, cards in enumerate(cards_per_segment) if cards is None]
+    
+    def store_group(start: int, group_cards: List[List[Dict[str, str]]]) -> None:
+        for i, cards in zip(missing[start:start + len(group_cards)], group_cards):
+            # Empty results may come from a failed answer batch; retry those next run
+            if cards:
+                cache.set("flashcards", keys[i], cards)
+            cards_per_segment[i] = cards
+    
+    if missing:
+        _generate_flashcards_uncached([segments[i] for i in missing], num_questions, store_group)
+    
+    return cards_per_segment
+
+
+def _generate_flashcards_uncached(segments: List[str], num_questions: int,
+                                  on_group_done: Optional[GroupCallback] = None) -> List[List[Dict[str, str]]]:
+    """
+    Generate flashcards in-process, or across worker processes when configured.
+    
+    Segments are processed in groups of at most config.AI_BATCH_SIZE;
+    ``on_group_done(start, cards)`` is called as each group completes.
+    """
+    num_workers = min(get_config().AI_NUM_WORKERS, len(segments))
+    if num_workers > 1:
+        return _generate_flashcards_in_processes(segments, num_questions, num_workers, on_group_done)
+    
+    group_size = get_config().AI_BATCH_SIZE
+    cards_per_segment: List[List[Dict[str, str]]] = []
+    for start in range(0, len(segments), group_size):
+        group_cards = _generate_flashcards_local(segments[start:start + group_size], num_questions)
+        cards_per_segment.extend(group_cards)
+        if on_group_done is not None:
+            on_group_done(start, group_cards)
+    return cards_per_segment
+
+
+def _generate_flashcards_local(segments: List[str], num_questions: int) -> List[List[Dict[str, str]]]:
+    """Run the question and answer batches for segments in this process."""
+    cards_per_segment: List[List[Dict[str, str]]] = [[] for _ in segments]
+    if not segments:
+        return cards_per_segment
+    
     try:
-        # Step 1: Generate questions
-        questions = _generate_questions(text, num_questions)
+        # Step 1: Generate questions for all segments
+        questions_per_segment = _generate_questions_batch(segments, num_questions)
+        
+        qa_pairs = [
+            (seg_idx, question)
+            for seg_idx, questions in enumerate(questions_per_segment)
+            for question in questions
+        ]
+        if not qa_pairs:
+            return cards_per_segment
         
-        # Step 2: Generate answers for each question
-        cards = []
-        for question in questions:
-            try:
-                answer = _generate_answer(text, question)
-                if _is_valid_qa_pair(question, answer):
-                    cards.append({"Question": question.strip(), "Answer": answer.strip()})
-            except Exception as e:
-                logger.warning(f"Failed to generate answer for question '{question}': {e}")
-                continue
+        # Step 2: Generate answers for all questions in one batched call
+        try:
+            answers = _generate_answers([(segments[seg_idx], question) for seg_idx, question in qa_pairs])
+        except Exception as e:
+            logger.warning(f"Failed to generate answers for {len(qa_pairs)} questions: {e}")
+            return cards_per_segment
         
-        return cards
+        # Resolve settings once for the whole batch rather than per pair
+        config = get_config()
+        for (seg_idx, question), answer in zip(qa_pairs, answers):
+            if _is_valid_qa_pair(question, answer, config):
+                cards_per_segment[seg_idx].append({"Question": question.strip(), "Answer": answer.strip()})
+        
+        return cards_per_segment
         
     except Exception as e:
         logger.error(f"Flashcard generation failed: {e}")
-        raise AIGenerationError("flashcards", len(text), e)
+        raise AIGenerationError("flashcards", sum(len(segment) for segment in segments), e)
+
+
+def _generate_flashcards_in_processes(segments: List[str], num_questions: int, num_workers: int,
+                                      on_group_done: Optional[GroupCallback] = None) -> List[List[Dict[str, str]]]:
+    """Split segments into shards and batch each shard in a pool of worker processes."""
+    config = get_config()
+    # Shards of at most one batch keep workers evenly loaded and progress visible
+    shard_size = min(-(-len(segments) // num_workers), config.AI_BATCH_SIZE)
+    shard_starts = list(range(0, len(segments), shard_size))
+    
+    # Each worker holds its own model replica; split the cores between them
+    threads_per_worker = max(1, (os.cpu_count() or 1) // num_workers)
+    settings = dataclasses.asdict(config)
+    
+    cards_per_segment: List[List[Dict[str, str]]] = [[] for _ in segments]
+    # Spawn, not fork: a forked worker would inherit the parent's cached (possibly
+    # CUDA) models and any torch/OpenMP state held mid-call by other threads, such
+    # as the model preload or the summary. The initializer rebuilds both from settings
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_generation_worker,
+                             initargs=(settings, threads_per_worker)) as executor:
+        futures = {
+            executor.submit(_generate_flashcards_local, segments[start:start + shard_size], num_questions): start
+            for start in shard_starts
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            start = futures[future]
+            shard_cards = future.result()
+            cards_per_segment[start:start + len(shard_cards)] = shard_cards
+            if on_group_done is not None:
+                on_group_done(start, shard_cards)
+            logger.info(f"Generated flashcards for shard {done}/{len(futures)}")
+    
+    return cards_per_segment
+
+
+def _init_generation_worker(settings: Dict[str, Any], num_threads: int) -> None:
+    """Mirror the parent's configuration in a worker and load its models once."""
+    import torch
+    
+    torch.set_num_threads(num_threads)
+    update_config(**settings)
+    
+    # Load up front so the first shard does not pay the model load
+    for model_name in {settings['AI_MODEL_NAME'], settings['AI_ANSWER_MODEL_NAME'] or settings['AI_MODEL_NAME']}:
+        get_ai_model(model_name)
 
 
-def _generate_questions(text: str, num_questions: int) -> List[str]:
-    """Generate questions from text using optimized prompting."""
+def _generate_texts(prompts: List[Prompt], model_name: Optional[str] = None,
+                    **generation_kwargs: Any) -> List[List[str]]:
+    """
+    Run all prompts through the model in batches.
+    
+    Every generation call goes through here, so prompts are always batched and
+    the backend can be swapped in a single place. ``model_name`` defaults to
+    config.AI_MODEL_NAME. Returns the generated texts for each prompt, in
+    prompt order.
+    """
     config = get_config()
+    model, tokenizer = get_ai_model(model_name)
+    input_ids = _encode_prompts(prompts, tokenizer)
+    num_return_sequences = generation_kwargs.get('num_return_sequences', 1)
     
-    questions_prompt = (
+    # Batch prompts of similar length together so little compute goes to padding
+    order = sorted(range(len(input_ids)), key=lambda i: len(input_ids[i]))
+    
+    texts: List[List[str]] = [[] for _ in prompts]
+    for start in range(0, len(order), config.AI_BATCH_SIZE):
+        batch_indices = order[start:start + config.AI_BATCH_SIZE]
+        batch = tokenizer.pad(
+            {'input_ids': [input_ids[i] for i in batch_indices]},
+            return_tensors='pt'
+        ).to(model.device)
+        outputs = model.generate(**batch, **generation_kwargs)
+        decoded = tokenizer.batch_decode(outputs, skip_special_tokens=True)
+        
+        # Sequences returned for the same prompt are contiguous
+        for offset, prompt_idx in enumerate(batch_indices):
+            group = decoded[offset * num_return_sequences:(offset + 1) * num_return_sequences]
+            texts[prompt_idx] = [text.strip() for text in group]
+    
+    return texts
+
+
+def _encode_prompts(prompts: List[Prompt], tokenizer: Any) -> List[List[int]]:
+    """
+    Tokenize prompts, encoding each distinct instruction, text and suffix once.
+    
+    A segment appears in its question prompt and in every one of its answer
+    prompts, so its token ids are computed once and spliced into each prompt.
+    When a prompt is too long only the text is truncated, which keeps the
+    instruction and the question intact.
+    """
+    max_length = tokenizer.model_max_length
+    token_cache: Dict[str, List[int]] = {}
+    
+    def encode(piece: str) -> List[int]:
+        ids = token_cache.get(piece)
+        if ids is None:
+            ids = tokenizer(piece, add_special_tokens=False).input_ids if piece else []
+            token_cache[piece] = ids
+        return ids
+    
+    input_ids = []
+    for instruction, text, suffix in prompts:
+        head = encode(instruction)
+        tail = encode(suffix) + [tokenizer.eos_token_id]
+        body = encode(text)[:max(0, max_length - len(head) - len(tail))]
+        input_ids.append(head + body + tail)
+    return input_ids
+
+
+def _build_questions_prompt(text: str, num_questions: int) -> Prompt:
+    """Build the JSON-array question prompt for a text."""
+    instruction = (
         f"Generate a JSON array of exactly {num_questions} distinct question strings based on the text. "
         "Output only the JSON array with no extra text before or after.\n"
         'Example format: ["Question 1?", "Question 2?"]\n\n'
-        f"Text:\n{text}"
+        "Text:"
     )
+    return (instruction, text, "")
+
+
+def _generate_questions_batch(texts: List[str], num_questions: int) -> List[List[str]]:
+    """Generate questions for several texts with one batched call."""
+    config = get_config()
     
-    generator = get_ai_generator()
-    questions_result = generator(
-        questions_prompt,
+    # Beam search keeps every beam anyway, so returning all of them as
+    # candidates covers duplicates and rejects at no extra decoding cost
+    num_beams = config.QUESTION_NUM_BEAMS
+    questions_prompts = [_build_questions_prompt(text, num_questions) for text in texts]
+    generated = _generate_texts(
+        questions_prompts,
         max_new_tokens=config.MAX_QUESTION_TOKENS,
-        num_beams=4,
-        num_return_sequences=1,
-        truncation=True,
+        num_beams=num_beams,
+        num_return_sequences=num_beams,
         do_sample=False
     )
     
-    # Parse JSON using optimized patterns
-    generated_questions_text = questions_result[0]['generated_text'].strip()
-    raw_questions = AIPatterns.extract_json_array(generated_questions_text)
-    
-    # Clean and validate questions
-    questions = _clean_and_validate_questions(raw_questions)
-    
-    # Fallback: generate additional questions if needed
-    if len(questions) < num_questions:
-        questions.extend(_generate_fallback_questions(text, num_questions - len(questions), questions))
+    questions_per_text = []
+    for generated_texts in generated:
+        # Parse every returned sequence, recovering questions from malformed output
+        raw_questions = []
+        for candidate in generated_texts:
+            raw_questions.extend(AIPatterns.extract_questions(candidate))
+        
+        # Clean, dedupe and keep the first num_questions valid ones
+        questions = _clean_and_validate_questions(raw_questions, config)
+        questions_per_text.append(questions[:num_questions])
     
-    return questions[:num_questions]
+    return questions_per_text
 
 
-def _clean_and_validate_questions(raw_questions: List[Any]) -> List[str]:
+def _clean_and_validate_questions(raw_questions: List[Any], config: Optional[Config] = None) -> List[str]:
     """Clean and validate generated questions."""
-    config = get_config()
+    config = config or get_config()
     normalized_questions = []
     seen = set()
     
@@ -109,7 +337,7 @@ def _clean_and_validate_questions(raw_questions: List[Any]) -> List[str]:
             continue
             
         # Normalize question
-        qn = str(q).strip().strip('"').strip("'")
+        qn = AIPatterns.strip_edge_quotes(q)
         
         # Apply quality filters
         if (len(qn) < config.MIN_QUESTION_LENGTH or 
@@ -128,72 +356,35 @@ def _clean_and_validate_questions(raw_questions: List[Any]) -> List[str]:
     return normalized_questions
 
 
-def _generate_fallback_questions(text: str, needed: int, existing: List[str]) -> List[str]:
-    """Generate additional questions one by one as fallback."""
-    config = get_config()
-    questions = []
-    existing_lower = {q.lower() for q in existing}
-    
-    for _ in range(needed):
-        single_prompt = (
-            "Generate one distinct, insightful question based on the text below. "
-            f"Do not repeat any of these: {list(existing_lower)}. "
-            "Output only the question.\n\n"
-            f"Text:\n{text}"
-        )
-        
-        try:
-            generator = get_ai_generator()
-            single_result = generator(
-                single_prompt,
-                max_new_tokens=64,
-                truncation=True,
-                do_sample=False,
-                num_beams=4
-            )
-            candidate = single_result[0]['generated_text'].strip()
-            normalized = candidate.lower()
-            
-            if (candidate and 
-                normalized not in existing_lower and 
-                not AIPatterns.is_generic_question(candidate)):
-                questions.append(candidate)
-                existing_lower.add(normalized)
-            else:
-                # Avoid infinite loop
-                break
-                
-        except Exception:
-            break
-    
-    return questions
-
-
-def _generate_answer(text: str, question: str) -> str:
-    """Generate answer for a specific question."""
-    config = get_config()
-    
-    answer_prompt = (
+def _build_answer_prompt(text: str, question: str) -> Prompt:
+    """Build the answer prompt for a single question."""
+    instruction = (
         "Based on the text below, answer the question in one concise sentence. "
         "Output only the answer. Do not repeat the question.\n\n"
-        f"Text: {text}\n\nQuestion: {question}\n\nAnswer:"
+        "Text:"
     )
+    return (instruction, text, f"Question: {question}\n\nAnswer:")
+
+
+def _generate_answers(qa_inputs: List[Tuple[str, str]]) -> List[str]:
+    """Generate answers for (text, question) pairs in a single batched call."""
+    config = get_config()
+    answer_prompts = [_build_answer_prompt(text, question) for text, question in qa_inputs]
     
-    generator = get_ai_generator()
-    answer_result = generator(
-        answer_prompt,
+    answer_results = _generate_texts(
+        answer_prompts,
+        model_name=config.AI_ANSWER_MODEL_NAME or config.AI_MODEL_NAME,
         max_new_tokens=config.MAX_ANSWER_TOKENS,
-        truncation=True,
         do_sample=False,
-        num_beams=4
+        num_beams=config.ANSWER_NUM_BEAMS
     )
     
-    return answer_result[0]['generated_text'].strip().strip('"').strip("'")
+    return [AIPatterns.strip_edge_quotes(texts[0]) for texts in answer_results]
 
 
-def _is_valid_qa_pair(question: str, answer: str) -> bool:
+def _is_valid_qa_pair(question: str, answer: str, config: Optional[Config] = None) -> bool:
     """Validate question-answer pair quality."""
-    config = get_config()
+    config = config or get_config()
     
     if not answer or not question:
         return False
@@ -1,12 +1,20 @@
-import json
+import codecs
 import logging
-from json import JSONDecodeError
+import mmap
+import os
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Set, Optional, Any
+from typing import Iterator, List, Dict, Set, Optional, Any, Tuple
 from ..config.settings import get_config
+from ..utils import serialization
 from ..utils.exceptions import StorageError
 
 
+def _strip_bom(data: bytes) -> bytes:
+    """Drop the UTF-8 byte order mark some editors write at the start of a file."""
+    return data[len(codecs.BOM_UTF8):] if data.startswith(codecs.BOM_UTF8) else data
+
+
 class FlashcardStorage:
     """Optimized flashcard storage with caching and efficient operations."""
     
@@ -16,36 +24,149 @@ class FlashcardStorage:
         self.logger = logging.getLogger(__name__)
         self._cache: Optional[List[Dict[str, str]]] = None
         self._cache_dirty = False
+        self._migrated = False
     
     def _load_from_disk(self) -> List[Dict[str, str]]:
         """Load flashcards from disk."""
-        if not self.storage_path.exists():
-            return []
-        
+        self._migrate_once()
         try:
-            with self.storage_path.open("r", encoding="utf-8") as f:
-                data = json.load(f)
-                return data if isinstance(data, list) else []
-        except (JSONDecodeError, ValueError) as e:
+            with self._map_storage() as mapped:
+                return self._parse_cards(mapped) if mapped is not None else []
+        except ValueError as e:
             self.logger.warning(f"Corrupted storage file, returning empty list: {e}")
             return []
         except Exception as e:
             raise StorageError("load", str(self.storage_path), e)
     
+    @contextmanager
+    def _map_storage(self) -> Iterator[Optional[mmap.mmap]]:
+        """Map the storage file read-only; yields None when it is missing or empty."""
+        try:
+            f = self.storage_path.open('rb')
+        except FileNotFoundError:
+            yield None
+            return
+        
+        with f:
+            # Empty files cannot be mapped
+            if os.fstat(f.fileno()).st_size == 0:
+                yield None
+                return
+            # Map the file rather than reading it into one buffer, so lines
+            # are copied out one at a time instead of the whole file at once
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if hasattr(mapped, 'madvise'):
+                    mapped.madvise(mmap.MADV_SEQUENTIAL)
+                yield mapped
+    
+    @staticmethod
+    def _is_legacy(data: mmap.mmap) -> bool:
+        """Check whether mapped storage holds a legacy JSON array."""
+        return _strip_bom(data[:64]).lstrip()[:1] == b'['
+    
+    def _parse_cards(self, data: mmap.mmap) -> List[Dict[str, str]]:
+        """Parse mapped JSON Lines storage, or a legacy file holding one JSON array."""
+        if self._is_legacy(data):
+            return self._parse_legacy(_strip_bom(data[:]))
+        return [card for _, card in self._iter_records(data)]
+    
+    def _iter_records(self, data: mmap.mmap) -> Iterator[Tuple[bytes, Dict[str, str]]]:
+        """Yield (line, card) for each JSON Lines record, skipping corrupted lines."""
+        # Start after a byte order mark, which would otherwise corrupt the first line
+        data.seek(len(codecs.BOM_UTF8) if data[:len(codecs.BOM_UTF8)] == codecs.BOM_UTF8 else 0)
+        for line_no, line in enumerate(iter(data.readline, b''), 1):
+            if not line.strip():
+                continue
+            try:
+                card = serialization.loads(line)
+            except ValueError as e:
+                # A torn last line from an interrupted append loses only that
+                # card; the next append starts on a fresh line after it
+                self.logger.warning(f"Skipping corrupted line {line_no} in {self.storage_path}: {e}")
+                continue
+            # Valid JSON that is not an object (e.g. a bare number) is no card
+            if not isinstance(card, dict):
+                self.logger.warning(f"Skipping corrupted line {line_no} in {self.storage_path}: "
+                                    f"expected a JSON object, got {type(card).__name__}")
+                continue
+            yield line, card
+    
+    @staticmethod
+    def _parse_legacy(data: bytes) -> List[Dict[str, str]]:
+        """Parse the legacy storage format, a single JSON array of cards."""
+        cards = serialization.loads(data)
+        return cards if isinstance(cards, list) else []
+    
+    @staticmethod
+    def _encode_cards(cards: List[Dict[str, str]]) -> bytes:
+        """Encode cards as JSON Lines, one card per line."""
+        return b''.join(serialization.dumps(card) + b'\n' for card in cards)
+    
     def _save_to_disk(self, cards: List[Dict[str, str]]) -> None:
-        """Save flashcards to disk."""
+        """Rewrite the whole storage file with cards."""
         try:
-            # Create backup if file exists
-            if self.storage_path.exists():
-                backup_path = self.storage_path.with_suffix('.json.backup')
-                self.storage_path.rename(backup_path)
-            
-            with self.storage_path.open("w", encoding="utf-8") as f:
-                json.dump(cards, f, ensure_ascii=False, indent=2)
-                
+            # Write a temporary file and swap it in, so a crash mid-write
+            # leaves the previous file intact without keeping a backup copy
+            tmp_path = self.storage_path.with_name(self.storage_path.name + '.tmp')
+            tmp_path.write_bytes(self._encode_cards(cards))
+            os.replace(tmp_path, self.storage_path)
         except Exception as e:
             raise StorageError("save", str(self.storage_path), e)
     
+    def _append_to_disk(self, cards: List[Dict[str, str]]) -> None:
+        """Append cards to the storage file without rewriting existing ones."""
+        self._migrate_once()
+        try:
+            data = self._encode_cards(cards)
+            with self.storage_path.open('a+b') as f:
+                # An interrupted append can leave a torn last line without its
+                # newline; end it first so the new cards are not glued onto it
+                end = f.seek(0, os.SEEK_END)
+                if end:
+                    f.seek(end - 1)
+                    if f.read(1) != b'\n':
+                        data = b'\n' + data
+                f.write(data)
+        except Exception as e:
+            raise StorageError("save", str(self.storage_path), e)
+    
+    def _migrate_once(self) -> None:
+        """Run migrate_legacy_storage before this instance first touches the file."""
+        if not self._migrated:
+            self._migrated = True
+            self.migrate_legacy_storage()
+    
+    def migrate_legacy_storage(self) -> bool:
+        """Convert legacy JSON array storage to JSON Lines.
+        
+        Converts the storage file in place if it holds a JSON array. If the
+        storage file does not exist yet, a legacy file with the same name and
+        a .json suffix (the old default, data/flashcards.json) is converted
+        into it and left untouched. Returns whether anything was migrated.
+        """
+        source = self.storage_path
+        if not source.exists():
+            source = self.storage_path.with_suffix('.json')
+            if source == self.storage_path or not source.exists():
+                return False
+        
+        try:
+            with source.open('rb') as f:
+                # JSON Lines files start with '{'; only arrays need converting
+                head = _strip_bom(f.read(64)).lstrip()
+                if head[:1] != b'[':
+                    return False
+                cards = self._parse_legacy(head + f.read())
+        except ValueError as e:
+            self.logger.warning(f"Could not migrate corrupted storage file {source}: {e}")
+            return False
+        except Exception as e:
+            raise StorageError("load", str(source), e)
+        
+        self._save_to_disk(cards)
+        self.logger.info(f"Migrated {len(cards)} flashcards from {source} to JSON Lines at {self.storage_path}")
+        return True
+    
     def load_flashcards(self) -> List[Dict[str, str]]:
         """Load flashcards with caching."""
         if self._cache is None or self._cache_dirty:
@@ -54,47 +175,65 @@ class FlashcardStorage:
         return self._cache.copy()  # Return copy to prevent external modification
     
     def save_flashcards(self, cards: List[Dict[str, str]], append: bool = True) -> None:
-        """Save flashcards efficiently."""
+        """Save flashcards efficiently.
+        
+        Appending writes only the new cards, so its cost does not grow with
+        the size of the stored collection.
+        """
         if not cards:
             return
         
         if append:
-            existing = self._load_from_disk()  # Load fresh from disk for append
-            existing.extend(cards)
-            self._cache = existing
+            self._append_to_disk(cards)
+            # Other writers may have appended too, so reload on next access
+            self._cache_dirty = True
         else:
             self._cache = cards.copy()
-        
-        self._save_to_disk(self._cache)
-        self._cache_dirty = False
+            self._save_to_disk(self._cache)
+            self._cache_dirty = False
     
     def clean_dataset(self) -> int:
-        """Remove duplicate flashcards and return number of removed duplicates."""
-        cards = self._load_from_disk()  # Load fresh from disk
-        if not cards:
-            self.logger.info("No flashcards to clean")
-            return 0
+        """Remove duplicate flashcards and return number of removed duplicates.
         
-        # Use more efficient deduplication
+        Records are streamed from the mapped file and unique ones are copied
+        unchanged to a temporary file, so memory holds the question keys
+        rather than every card.
+        """
+        self._migrate_once()
+        tmp_path = self.storage_path.with_name(self.storage_path.name + '.tmp')
         seen_questions: Set[str] = set()
-        unique_cards: List[Dict[str, str]] = []
-        
-        for card in cards:
-            question = card.get('Question', '').strip().lower()
-            if question and question not in seen_questions:
-                seen_questions.add(question)
-                unique_cards.append(card)
+        total = 0
         
-        # Only save if there were duplicates
-        duplicates_removed = len(cards) - len(unique_cards)
-        if duplicates_removed > 0:
-            self._cache = unique_cards
-            self._save_to_disk(unique_cards)
-            self._cache_dirty = False
+        try:
+            with self._map_storage() as mapped:
+                if mapped is None or self._is_legacy(mapped):
+                    # Legacy files that survive migration failed to parse
+                    self.logger.info("No flashcards to clean")
+                    return 0
+                
+                with tmp_path.open('wb') as out:
+                    for line, card in self._iter_records(mapped):
+                        total += 1
+                        question = card.get('Question', '').strip().lower()
+                        if question and question not in seen_questions:
+                            seen_questions.add(question)
+                            out.write(line if line.endswith(b'\n') else line + b'\n')
             
-            self.logger.info(f"Cleaned dataset: {len(cards)} → {len(unique_cards)} unique flashcards")
-        
-        return duplicates_removed
+            # Only replace the file if there were duplicates
+            duplicates_removed = total - len(seen_questions)
+            if duplicates_removed > 0:
+                os.replace(tmp_path, self.storage_path)
+                self._cache_dirty = True
+                self.logger.info(f"Cleaned dataset: {total} → {len(seen_questions)} unique flashcards")
+            else:
+                tmp_path.unlink()
+                if total == 0:
+                    self.logger.info("No flashcards to clean")
+            
+            return duplicates_removed
+        except Exception as e:
+            tmp_path.unlink(missing_ok=True)
+            raise StorageError("clean", str(self.storage_path), e)
     
     def clear_cache(self) -> None:
         """Clear the in-memory cache."""
@@ -112,24 +251,33 @@ class FlashcardStorage:
         }
 
 
-# Global storage instance
-_storage = FlashcardStorage()
+# Global storage instance, created on first use so importing this module
+# does not load the configuration
+_storage: Optional[FlashcardStorage] = None
+
+
+def _get_storage() -> FlashcardStorage:
+    """Get the global storage instance."""
+    global _storage
+    if _storage is None:
+        _storage = FlashcardStorage()
+    return _storage
 
 
 # Backward compatible functions
 def load_flashcards() -> List[Dict[str, str]]:
     """Load flashcards using the global storage instance."""
-    return _storage.load_flashcards()
+    return _get_storage().load_flashcards()
 
 
 def save_flashcards(cards: List[Dict[str, str]]) -> None:
     """Save flashcards using the global storage instance."""
-    _storage.save_flashcards(cards)
+    _get_storage().save_flashcards(cards)
 
 
 def clean_dataset() -> int:
     """Clean dataset using the global storage instance."""
-    duplicates_removed = _storage.clean_dataset()
+    duplicates_removed = _get_storage().clean_dataset()
     if duplicates_removed > 0:
         print(f"\n✅ Cleaned dataset: removed {duplicates_removed} duplicates")
     return duplicates_removed
@@ -1,8 +1,15 @@
-from bs4 import BeautifulSoup
-import ftfy
-from typing import List, Optional
+from bisect import bisect_left
+from functools import lru_cache
+from itertools import accumulate
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
 import logging
-from ..utils.model_manager import get_nlp_model
+
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:  # Optional dependency
+    HTMLParser = None
+
+from ..utils.model_manager import get_nlp_model, get_ai_tokenizer
 from ..utils.patterns import TextCleaner, TextPatterns
 from ..config.settings import get_config
 from ..utils.exceptions import TextProcessingError
@@ -13,36 +20,58 @@ logger = logging.getLogger(__name__)
 def text_normalization(text: str) -> str:
     """Normalize and clean input text efficiently."""
     try:
-        # Remove HTML, non-word chars, normalize whitespace
-        text = TextCleaner.remove_html_tags(text)
-        soup = BeautifulSoup(text, "html.parser")
-        text = soup.get_text()
-        text = TextCleaner.remove_non_word_chars(text)
-        text = TextCleaner.normalize_whitespace(text)
-
-        # Normalize quotes and fix encoding
-        text = text.replace("“", '"').replace("”", '"')
-        text = text.replace("‘", "'").replace("’", "'")
-        text = ftfy.fix_text(text)
-
-        # Remove headers/footers
-        text = remove_headers_footers(text)
-        return text.lower().strip()
+        return _normalize_cached(text)
     except Exception as e:
         raise TextProcessingError("text_normalization", len(text), e)
 
 
+# Regenerating flashcards from the same source reruns normalization and
+# segmentation on identical text. The text itself is the cache key: a str
+# computes its hash once and keeps it, and a hit is confirmed with a memcmp,
+# so a separate content digest would add a pass without saving one. Entries
+# hold whole documents, and repeats are almost always of the latest one, so
+# only the last couple are kept
+_TEXT_CACHE_SIZE = 2
+
+
+@lru_cache(maxsize=_TEXT_CACHE_SIZE)
+def _normalize_cached(text: str) -> str:
+    """Run the normalization steps of text_normalization."""
+    # Remove HTML, non-word chars, normalize whitespace. Quotes of any
+    # kind are non-word characters, so no separate quote pass is needed
+    # The HTML parser strips tags and decodes entities in one pass; text
+    # with neither has nothing for it to do
+    if '<' in text or '&' in text:
+        text = _html_to_text(text)
+    text = TextCleaner.remove_non_word_chars(text)
+    text = TextCleaner.normalize_whitespace(text)
+
+    # Fix encoding. With control characters, entities and line breaks
+    # already gone, ftfy leaves ASCII text unchanged, so skip it there
+    if not text.isascii():
+        import ftfy
+        text = ftfy.fix_text(text)
+
+    # Remove headers/footers
+    text = remove_headers_footers(text)
+    return text.lower().strip()
+
+
+def _html_to_text(text: str) -> str:
+    """Return the text content of HTML, with entities decoded."""
+    if HTMLParser is not None:
+        # selectolax parses in C, far faster than bs4's pure-Python html.parser
+        root = HTMLParser(text).root
+        return root.text(separator='') if root is not None else ''
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(text, "html.parser").get_text()
+
+
 def remove_headers_footers(text: str) -> str:
     """Remove page numbers and standalone numbers often present in headers/footers."""
-    lines = text.split('\n')
-    cleaned_lines = []
-    for line in lines:
-        if TextCleaner.is_page_number(line):
-            continue
-        if TextCleaner.is_standalone_number(line):
-            continue
-        cleaned_lines.append(line)
-    return '\n'.join(cleaned_lines)
+    # One strip and one check per line, instead of one for each kind of number
+    is_header_footer_line = TextCleaner.is_header_footer_line
+    return '\n'.join(line for line in text.split('\n') if not is_header_footer_line(line))
 
 
 def segment_text(text: str, max_length: Optional[int] = None) -> List[str]:
@@ -52,40 +81,48 @@ def segment_text(text: str, max_length: Optional[int] = None) -> List[str]:
         max_length = config.MAX_CHUNK_LENGTH
 
     try:
-        nlp = get_nlp_model()
-        doc = nlp(text)
-        sentences = [sent.text.strip() for sent in doc.sents if sent.text.strip()]
+        sentences: Iterable[str] = _spacy_sentences(text)
     except Exception:
-        # Regex fallback
-        sentences = TextCleaner.split_sentences(text)
+        # Regex fallback; sentences are consumed once in order, so stream them
+        sentences = TextCleaner.iter_sentences(text)
 
+    # Collect each chunk's sentences and join once, rather than growing a
+    # string that is copied on every append
     chunks: List[str] = []
-    current = ""
+    current: List[str] = []
+    current_length = 0
     for sentence in sentences:
-        if len(current) + len(sentence) + 1 <= max_length:
-            current += (" " if current else "") + sentence
+        if current_length + len(sentence) + 1 <= max_length:
+            current_length += len(sentence) + (1 if current else 0)
+            current.append(sentence)
         else:
             if current:
-                chunks.append(current)
-            current = sentence
+                chunks.append(" ".join(current))
+            current = [sentence]
+            current_length = len(sentence)
     if current:
-        chunks.append(current)
+        chunks.append(" ".join(current))
 
     return chunks if chunks else [text]
 
 
-def filter_segments(segments: List[str], min_length: Optional[int] = None) -> List[str]:
+def filter_segments(segments: Iterable[str], min_length: Optional[int] = None) -> List[str]:
     """Filter out too-short and low-value segments."""
     config = get_config()
     if min_length is None:
         min_length = config.MIN_SEGMENT_LENGTH
 
     filtered: List[str] = []
+    seen = set()
     for segment in segments:
         s = segment.strip()
+        # Identical segments (e.g. repeated pages) would only repeat generation work
+        if s in seen:
+            continue
         if (len(s) >= min_length and
             not TextCleaner.is_procedural_content(s) and
             not TextCleaner.is_boilerplate_content(s)):
+            seen.add(s)
             filtered.append(s)
     return filtered
 
@@ -98,43 +135,170 @@ def segment_into_chunks(text: str, target_words: Optional[int] = None, overlap_r
     if overlap_ratio is None:
         overlap_ratio = config.CHUNK_OVERLAP_RATIO
 
+    # Copy out of the cache so callers can't mutate a cached result
+    return list(_chunks_cached(text, target_words, overlap_ratio))
+
+
+@lru_cache(maxsize=_TEXT_CACHE_SIZE)
+def _chunks_cached(text: str, target_words: int, overlap_ratio: float) -> Tuple[str, ...]:
+    """Cached chunks of segment_into_chunks, keyed like _normalize_cached."""
+    return tuple(segment_many([text], target_words, overlap_ratio)[0])
+
+
+def segment_many(texts: List[str], target_words: Optional[int] = None, overlap_ratio: Optional[float] = None,
+                 n_process: int = 1) -> List[List[str]]:
+    """Segment several texts like segment_into_chunks, parsing them in one batch.
+
+    The sentences of every text go through a single nlp.pipe call, so batch
+    workloads share spaCy's per-call overhead; ``n_process`` > 1 also spreads
+    parsing over that many worker processes. Returns the chunks of each text,
+    in text order.
+    """
+    config = get_config()
+    if target_words is None:
+        target_words = config.TARGET_WORDS_PER_CHUNK
+    if overlap_ratio is None:
+        overlap_ratio = config.CHUNK_OVERLAP_RATIO
+
+    chunks_per_text: List[List[str]] = []
+    for sentences in _split_many_into_sentences(texts, n_process):
+        word_counts = [len(sent.split()) for sent in sentences]
+        chunks_per_text.append(list(_iter_chunks(sentences, word_counts, target_words, overlap_ratio)))
+    return chunks_per_text
+
+
+def segment_by_tokens(text: str, target_tokens: Optional[int] = None, overlap_ratio: Optional[float] = None,
+                      tokenizer: Any = None) -> List[str]:
+    """Segment text into overlapping chunks by model token count while preserving sentence boundaries.
+
+    Word counts map unevenly onto sentencepiece tokens, so counting tokens
+    directly keeps segment lengths uniform and reduces padding when segments
+    are batched through the model.
+    """
+    return list(iter_chunks_by_tokens(text, target_tokens, overlap_ratio, tokenizer))
+
+
+def iter_chunks_by_tokens(text: str, target_tokens: Optional[int] = None, overlap_ratio: Optional[float] = None,
+                          tokenizer: Any = None) -> Iterator[str]:
+    """Yield the chunks of segment_by_tokens one at a time.
+
+    Chunks overlap, so together they hold more text than the input; feeding
+    them straight into filter_segments avoids keeping all of them at once.
+    """
+    config = get_config()
+    if target_tokens is None:
+        target_tokens = config.TARGET_TOKENS_PER_CHUNK
+    if overlap_ratio is None:
+        overlap_ratio = config.CHUNK_OVERLAP_RATIO
+    if tokenizer is None:
+        tokenizer = get_ai_tokenizer()
+
+    sentences = _split_into_sentences(text)
+    if not sentences:
+        return
+    token_counts = [len(ids) for ids in tokenizer(sentences, add_special_tokens=False).input_ids]
+    yield from _iter_chunks(sentences, token_counts, target_tokens, overlap_ratio)
+
+
+def segment_texts_bulk(texts: Iterable[str], batch_size: int = 32, n_process: int = 1) -> List[List[str]]:
+    """Split several texts into sentences with spaCy, parsing them in batches.
+
+    nlp.pipe batches the texts through each pipeline component, which is much
+    cheaper than calling nlp once per text. Returns the sentences of each text,
+    in text order.
+    """
+    nlp = get_nlp_model()
+    return [
+        [sentence for sentence in (sent.text.strip() for sent in doc.sents) if sentence]
+        for doc in nlp.pipe(texts, batch_size=batch_size, n_process=n_process)
+    ]
+
+
+# Characters per piece a long text is split into before parsing. Pieces go
+# through nlp.pipe in batches, so memory stays bounded and texts longer than
+# spaCy's max_length are still parsed instead of falling back to regex
+_SPACY_PIECE_CHARS = 100_000
+
+
+def _split_for_spacy(text: str, piece_chars: int = _SPACY_PIECE_CHARS) -> List[str]:
+    """Cut text into pieces of at most piece_chars, at regex sentence boundaries."""
+    pieces: List[str] = []
+    start = 0
+    while len(text) - start > piece_chars:
+        end = start + piece_chars
+        # Cut after the last sentence boundary in the window, or hard-cut
+        # in the rare window without one
+        boundary = None
+        for boundary in TextPatterns.SENTENCE_BOUNDARY.finditer(text, start, end):
+            pass
+        cut = boundary.end() if boundary is not None else end
+        pieces.append(text[start:cut])
+        start = cut
+    pieces.append(text[start:])
+    return pieces
+
+
+def _spacy_sentences_many(texts: List[str], n_process: int = 1) -> List[List[str]]:
+    """Split texts into sentences with spaCy, piping the pieces of all texts together."""
+    pieces_per_text = [_split_for_spacy(text) for text in texts]
+    piece_sentences = iter(segment_texts_bulk(
+        (piece for pieces in pieces_per_text for piece in pieces), n_process=n_process
+    ))
+    # Pieces come back in order, so each text takes the next len(pieces) results
+    return [
+        [sentence for _ in pieces for sentence in next(piece_sentences)]
+        for pieces in pieces_per_text
+    ]
+
+
+def _spacy_sentences(text: str) -> List[str]:
+    """Split text into sentences with spaCy."""
+    return _spacy_sentences_many([text])[0]
+
+
+def _split_many_into_sentences(texts: List[str], n_process: int = 1) -> List[List[str]]:
+    """Split texts into sentences with spaCy, falling back to regex."""
     try:
-        nlp = get_nlp_model()
-        doc = nlp(text)
-        sentences = [sent.text.strip() for sent in doc.sents if sent.text.strip()]
+        return _spacy_sentences_many(texts, n_process)
     except Exception:
-        sentences = TextCleaner.split_sentences(text)
+        return [TextCleaner.split_sentences(text) for text in texts]
 
-    chunks: List[str] = []
-    idx = 0
+
+def _split_into_sentences(text: str) -> List[str]:
+    """Split text into sentences with spaCy, falling back to regex."""
+    return _split_many_into_sentences([text])[0]
+
+
+def _iter_chunks(sentences: List[str], lengths: List[int], target: int, overlap_ratio: float) -> Iterator[str]:
+    """Yield overlapping chunks of about ``target`` length units, grouping sentences."""
     num_sentences = len(sentences)
-    if num_sentences == 0:
-        return []
+    if target <= 0:
+        return
+
+    # ends[i] is the total length of sentences[:i]; a chunk starting at idx
+    # ends at the first sentence boundary reaching ``target`` past ends[idx]
+    ends = [0, *accumulate(lengths)]
+    idx = 0
 
     while idx < num_sentences:
-        current_chunk: List[str] = []
-        word_count = 0
-        while idx < num_sentences and word_count < target_words:
-            sent = sentences[idx]
-            current_chunk.append(sent)
-            word_count += len(sent.split())
-            idx += 1
+        end = min(bisect_left(ends, ends[idx] + target, idx + 1), num_sentences)
+        chunk_size = end - idx
 
-        if not current_chunk:
-            break
+        yield ' '.join(sentences[idx:end]).strip()
 
-        chunks.append(' '.join(current_chunk).strip())
+        # Stepping back for overlap after the last sentence would only emit a
+        # chunk fully contained in this one
+        if end >= num_sentences:
+            break
 
         # Compute overlap in sentences for next chunk start
-        overlap_sentence_count = max(1, int(len(current_chunk) * overlap_ratio))
-        idx = max(0, idx - overlap_sentence_count)
+        overlap_sentence_count = max(1, int(chunk_size * overlap_ratio))
+        idx = max(0, end - overlap_sentence_count)
 
         # Ensure progress to avoid infinite loop when chunk is a single sentence
-        if overlap_sentence_count >= len(current_chunk):
+        if overlap_sentence_count >= chunk_size:
             idx += 1
 
-    return chunks
-
 
 def filter(text: str, min_length: Optional[int] = None) -> str:
     """Backward-compatible filter for a raw text string."""
@@ -142,9 +306,9 @@ def filter(text: str, min_length: Optional[int] = None) -> str:
     if min_length is None:
         min_length = config.MIN_SEGMENT_LENGTH
 
-    lines = text.split('\n')
-    filtered_lines: List[str] = []
-    for line in lines:
-        if not TextCleaner.is_procedural_content(line) and not TextCleaner.is_boilerplate_content(line):
-            filtered_lines.append(line)
-    return '\n'.join(filtered_lines).strip()
+    is_procedural_content = TextCleaner.is_procedural_content
+    is_boilerplate_content = TextCleaner.is_boilerplate_content
+    return '\n'.join(
+        line for line in text.split('\n')
+        if not is_procedural_content(line) and not is_boilerplate_content(line)
+    ).strip()
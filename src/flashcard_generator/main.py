@@ -1,7 +1,11 @@
-from .core.ai import generate_flashcards, generate_summary
+from .core.ai import generate_flashcards_batch, generate_summary
 from .core.storage import clean_dataset, save_flashcards, load_flashcards
-from .core.text_processor import text_normalization, segment_into_chunks, filter_segments, filter
+from .core.text_processor import text_normalization, iter_chunks_by_tokens, filter_segments, filter
 from .processing.input_processor import process_input
+from .config.settings import get_config
+from .utils.model_manager import ModelManager, cuda_available
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 import os
 
 
@@ -39,9 +43,41 @@ def get_input():
         return input("Enter text to generate flashcards: ") # Return the manual text entry
 
 
+def generate_flashcards_and_summary(text: str, segments: List[str]
+                                    ) -> Tuple[List[List[Dict[str, str]]], Optional[Exception]]:
+    """Generate flashcards for segments and a summary of text.
+    
+    Returns the flashcards per segment and the summary's error, if any, so a
+    failed summary does not discard flashcards that were already generated.
+    """
+    config = get_config()
+    # Both share one model. On a GPU the summary can run alongside the
+    # flashcard batches; on CPU they would only compete for the same cores,
+    # and torch.compile's static cache and CUDA graphs are not safe for
+    # concurrent generate calls
+    if cuda_available() and not config.ENABLE_TORCH_COMPILE:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            summary_future = executor.submit(generate_summary, text)
+            flashcards_per_segment = generate_flashcards_batch(segments, num_questions=3)
+            summary_error = summary_future.exception()
+        return flashcards_per_segment, summary_error
+    
+    flashcards_per_segment = generate_flashcards_batch(segments, num_questions=3)
+    try:
+        generate_summary(text)
+    except Exception as e:
+        return flashcards_per_segment, e
+    return flashcards_per_segment, None
+
+
 def main():
     """Main function with enhanced input processing."""
     
+    # Load the AI models while input is read and extracted, so model loading
+    # overlaps prompting and OCR instead of following them
+    if get_config().ENABLE_MODEL_PRELOADING:
+        ModelManager.get_instance().preload_in_background()
+    
     # Phase 0: Input Processing (NEW)
     try:
         raw_text = get_input() # Get the input from the user
@@ -51,6 +87,7 @@ def main():
             return # Exit the function if no text was provided  
             
         print(f"\n✅ Successfully extracted {len(raw_text)} characters of text")
+        
         print("\n=== Proceeding to flashcard generation pipeline ===")
         
     except Exception as e:
@@ -61,34 +98,36 @@ def main():
     try:
         normalized_text = text_normalization(raw_text)
         cleaned_text = filter(normalized_text)
-        chunks = segment_into_chunks(cleaned_text, target_words=220, overlap_ratio=0.2)
+        # Stream chunks into the filter so the overlapping chunks are never all held at once
+        chunks = iter_chunks_by_tokens(cleaned_text, target_tokens=256, overlap_ratio=0.2)
         filtered_segments = filter_segments(chunks, min_length=50)
         
         print(f"Processing {len(filtered_segments)} text segments...")
         
-        # Generate summary from cleaned text
-        generate_summary(cleaned_text)
+        flashcards_per_segment, summary_error = generate_flashcards_and_summary(cleaned_text, filtered_segments)
         
-        # Generate flashcards for each segment
         all_flashcards = []
-        for i, segment in enumerate(filtered_segments, 1): # Starting from 1 to match the enumerate syntax for the print statements
-            print(f"\n--- Processing segment {i}/{len(filtered_segments)} ---")
-            flashcards = generate_flashcards(segment, num_questions=3)
+        for i, flashcards in enumerate(flashcards_per_segment, 1): # Starting from 1 to match the enumerate syntax for the print statements
+            print(f"\n--- Segment {i}/{len(filtered_segments)}: {len(flashcards)} flashcards ---")
             all_flashcards.extend(flashcards) # Extend the list with the new flashcards list
         
         # Save all flashcards at once
         if all_flashcards:
-            save_flashcards(all_flashcards) # Save the all_flashcards list to the flashcards.json file
+            save_flashcards(all_flashcards) # Save the all_flashcards list to the flashcards.jsonl file
             clean_dataset()
             
             # Display results
-            cards = load_flashcards() # Load the flashcards.json file into a list
+            cards = load_flashcards() # Load the flashcards.jsonl file into a list
             print(f"\n=== Generated {len(cards)} Total Flashcards ===")
             for i, card in enumerate(cards, 1):
                 print(f"{i}. Q: {card['Question']}") # Print the question
                 print(f"   A: {card['Answer']}\n") # Print the answer
         else:
             print("No flashcards generated.") # Print a message if no flashcards were generated
+        
+        # Report a failed summary only once the flashcards are saved
+        if summary_error is not None:
+            raise summary_error
             
     except Exception as e:
         print(f"Error during flashcard generation: {e}") # Print an error message if there was an error during the flashcard generation
@@ -1,57 +1,134 @@
-import fitz  # PyMuPDF
+import codecs
+import hashlib
+import io
 import os
 import logging
-import mimetypes
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
 from pathlib import Path
-from typing import List, Union, Optional
+from typing import TYPE_CHECKING, Any, Callable, List, Optional, Union
 from logging import getLogger
-from ..utils.model_manager import get_ocr_reader
+from ..utils.cache import get_result_cache
+from ..utils.model_manager import cuda_available, get_ocr_reader
 from ..utils.patterns import FilePatterns
 from ..config.settings import get_config
 from ..utils.exceptions import InputProcessingError, FileTypeError, OCRError
+from .pdf_pages import render_doc_pages, render_page_range, text_from_page_range, text_from_pages
+
+if TYPE_CHECKING:
+    import easyocr
+    import fitz
+    import numpy as np
+
+logger = getLogger(__name__)
+
+
+def _require_file(file_path: str, description: str) -> os.stat_result:
+    """Stat a file once, raising InputProcessingError if it does not exist."""
+    try:
+        return os.stat(file_path)
+    except FileNotFoundError:
+        raise InputProcessingError(file_path, f"{description} not found")
 
 
 def detect_file_type(file_path: Union[str, Path]) -> str:
-    """Auto-detect file type based on extension and MIME type."""
+    """Auto-detect file type based on extension."""
     file_path_str = str(file_path)
-    if not os.path.exists(file_path_str):
+    try:
+        os.stat(file_path_str)
+    except FileNotFoundError:
         raise FileNotFoundError(f"File not found: {file_path}")
     
-    # Use optimized patterns for file type detection
-    if FilePatterns.is_pdf_file(file_path_str):
-        return 'pdf'
-    elif FilePatterns.is_image_file(file_path_str):
-        return 'image'
-    elif FilePatterns.is_text_file(file_path_str):
-        return 'text'
-    
-    # Fallback to MIME type detection
-    mime_type, _ = mimetypes.guess_type(file_path_str)
-    if mime_type:
-        if 'pdf' in mime_type:
-            return 'pdf'
-        elif mime_type.startswith('image/'):
-            return 'image'
-        elif mime_type.startswith('text/'):
-            return 'text'
+    return FilePatterns.file_type(file_path_str)
+
+
+def _has_meaningful_text(text: str, min_chars: int) -> bool:
+    """Check whether text has more than min_chars of content besides blank and
+    number-only lines (e.g. the page numbers of a scanned PDF's text layer)."""
+    count = 0
+    # splitlines also breaks at the form feeds that end each PDF page
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped and not stripped.isdigit():
+            count += len(stripped) + 1
+            # Stop as soon as the answer is known instead of scanning the whole text
+            if count > min_chars:
+                return True
+    return False
+
+
+def _filter_ocr_results(results: list, threshold: float) -> List[str]:
+    """Keep the text of EasyOCR (bbox, text, confidence) results above threshold."""
+    # EasyOCR confidences are already numeric, so compare them directly
+    return [text for _, text, confidence in results if confidence > threshold]
+
+
+def _extraction_cache_key(file_path: str, *settings) -> Optional[str]:
+    """Key extracted text by file content and extraction settings; None when caching is off."""
+    if not get_config().ENABLE_CACHING:
+        return None
     
-    return 'unknown'
+    digest = hashlib.blake2b()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return get_result_cache().make_key(digest.hexdigest(), *settings)
 
 
 def extract_text_from_pdf(pdf_path: Union[str, Path]) -> str:
     """Extract selectable text from a PDF efficiently."""
     pdf_path_str = str(pdf_path)
-    if not os.path.exists(pdf_path_str):
-        raise InputProcessingError(pdf_path_str, "PDF file not found")
+    _require_file(pdf_path_str, "PDF file")
     
     try:
+        import fitz  # PyMuPDF, imported on first PDF so text-only runs skip it
+        
         with fitz.open(pdf_path_str) as doc:
-            text_parts = [page.get_text() for page in doc] # type: ignore
-            return "".join(text_parts)
+            return _text_from_doc(doc, pdf_path_str, get_config().PDF_MARGIN_RATIO)
     except Exception as e:
         raise InputProcessingError(pdf_path_str, "Failed to extract PDF text", e)
 
 
+# Fewest pages worth handing to a worker process; below this, starting the
+# worker costs more than extracting the pages in place
+_MIN_PAGES_PER_TEXT_WORKER = 32
+
+
+def _split_pages(pages: range, num_parts: int) -> List[range]:
+    """Split pages into at most num_parts contiguous ranges."""
+    size = -(-len(pages) // num_parts)
+    return [pages[start:start + size] for start in range(0, len(pages), size)]
+
+
+def _page_worker_pool(num_workers: int) -> Optional[ProcessPoolExecutor]:
+    """A pool of processes for per-page PDF work, or None to work in-process.
+    
+    Callers hand each worker a contiguous page range from pdf_pages, so each
+    document is opened once per worker. Workers are started with forkserver
+    (or spawn) rather than fork: the model preload thread may be inside
+    from_pretrained or holding torch and tokenizer locks, and a forked child
+    would inherit those locks held forever.
+    """
+    if num_workers <= 1:
+        return None
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return ProcessPoolExecutor(max_workers=num_workers, mp_context=multiprocessing.get_context(method))
+
+
+def _text_from_doc(doc: 'fitz.Document', pdf_path: str, margin_ratio: float) -> str:
+    """Extract the selectable text of an open PDF, splitting long documents across processes."""
+    page_count = doc.page_count
+    num_workers = min(get_config().PDF_MAX_WORKERS or os.cpu_count() or 1,
+                      page_count // _MIN_PAGES_PER_TEXT_WORKER)
+    pool = _page_worker_pool(num_workers)
+    if pool is None:
+        return text_from_pages(doc, range(page_count), margin_ratio)
+    with pool:
+        ranges = _split_pages(range(page_count), num_workers)
+        return ''.join(pool.map(text_from_page_range, repeat(pdf_path), ranges, repeat(margin_ratio)))
+
+
 def extract_text_from_image(image_path: Union[str, Path], languages: Optional[List[str]] = None) -> str:
     """Extract text from image using optimized OCR."""
     config = get_config()
@@ -59,42 +136,84 @@ def extract_text_from_image(image_path: Union[str, Path], languages: Optional[Li
         languages = config.OCR_DEFAULT_LANGUAGES
         
     image_path_str = str(image_path)
-    if not os.path.exists(image_path_str):
-        raise InputProcessingError(image_path_str, "Image file not found")
+    _require_file(image_path_str, "Image file")
     
     try:
+        # Reuse OCR output for an image with identical content and settings
+        cache_key = _extraction_cache_key(image_path_str, 'image', sorted(languages), config.OCR_CONFIDENCE_THRESHOLD)
+        if cache_key is not None:
+            cached = get_result_cache().get("extracted_text", cache_key)
+            if cached is not None:
+                return cached
+        
         # Use ModelManager for OCR reader
         reader = get_ocr_reader(languages)
         results = reader.readtext(image_path_str)
         
-        # Extract text using config threshold
-        text_parts = []
-        for (bbox, text, confidence) in results:
-            if float(confidence) > config.OCR_CONFIDENCE_THRESHOLD:
-                text_parts.append(text)
-        
-        return " ".join(text_parts)
+        text = " ".join(_filter_ocr_results(results, config.OCR_CONFIDENCE_THRESHOLD))
+        if cache_key is not None:
+            get_result_cache().set("extracted_text", cache_key, text)
+        return text
     except Exception as e:
         raise OCRError(image_path_str, languages, e)
 
 
-def read_text_file(file_path: Union[str, Path]) -> str:
-    """Read content from a text file with encoding fallback."""
+# Byte order marks and the codecs that decode (and drop) them
+_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+
+def _decode_text(data: bytes) -> Optional[str]:
+    """Decode file bytes with a single decode in the common cases.
+    
+    A byte order mark decides the codec outright; otherwise UTF-8 is tried,
+    with latin-1 as the fallback since it accepts any byte sequence.
+    """
+    # UTF-32 LE is checked before UTF-16 LE because its BOM starts with it
+    for bom, encoding in _BOMS:
+        if data.startswith(bom):
+            try:
+                return data.decode(encoding)
+            except UnicodeDecodeError:
+                return None
+    
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data.decode('latin-1')
+
+
+def read_text_file(file_path: Union[str, Path], file_stat: Optional[os.stat_result] = None) -> str:
+    """Read content from a text file with encoding fallback.
+    
+    ``file_stat`` may be the caller's stat result for file_path, to avoid
+    statting the file again.
+    """
     file_path_str = str(file_path)
-    if not os.path.exists(file_path_str):
-        raise InputProcessingError(file_path_str, "Text file not found")
+    if file_stat is None:
+        file_stat = _require_file(file_path_str, "Text file")
+    # An empty file needs no open at all
+    if file_stat.st_size == 0:
+        return ""
     
-    encodings = ['utf-8', 'latin-1', 'cp1252', 'utf-16']
-    for encoding in encodings:
-        try:
-            with open(file_path_str, 'r', encoding=encoding) as file:
-                return file.read()
-        except UnicodeDecodeError:
-            continue
-        except Exception as e:
-            raise InputProcessingError(file_path_str, f"Failed to read with encoding {encoding}", e)
+    # Read the bytes once and decode in memory, rather than re-opening and
+    # re-reading the file for every fallback encoding
+    try:
+        with open(file_path_str, 'rb') as file:
+            data = file.read()
+    except Exception as e:
+        raise InputProcessingError(file_path_str, "Failed to read file", e)
     
-    raise InputProcessingError(file_path_str, "Unable to read file with any supported encoding")
+    text = _decode_text(data)
+    if text is None:
+        raise InputProcessingError(file_path_str, "Unable to read file with any supported encoding")
+    # Match text-mode reads, which translate universal newlines
+    return text.replace('\r\n', '\n').replace('\r', '\n')
 
 
 class PDFTextExtractor:
@@ -106,71 +225,209 @@ class PDFTextExtractor:
         self.logger = getLogger(__name__)
         self.config = config
     
+    @property
+    def ocr_reader(self) -> 'easyocr.Reader':
+        """The shared EasyOCR reader for this extractor's languages.
+        
+        Readers are owned by ModelManager, so every extractor (and image OCR)
+        with an equivalent language set reuses one loaded reader.
+        """
+        return get_ocr_reader(self.languages)
+    
     def extract_text(self, pdf_path: Union[str, Path], use_ocr_fallback: bool = True) -> str:
         """Extract text from PDF with OCR fallback for scanned documents."""
         pdf_path_str = str(pdf_path)
-        if not os.path.exists(pdf_path_str):
-            raise InputProcessingError(pdf_path_str, "PDF file not found")
+        _require_file(pdf_path_str, "PDF file")
+        
+        # Reuse extraction output for a PDF with identical content and settings
+        cache_key = _extraction_cache_key(pdf_path_str, 'pdf', use_ocr_fallback, sorted(self.languages),
+                                          self.config.OCR_CONFIDENCE_THRESHOLD, self.config.PDF_MARGIN_RATIO,
+                                          self.config.OCR_RENDER_DPI)
+        if cache_key is not None:
+            cached = get_result_cache().get("extracted_text", cache_key)
+            if cached is not None:
+                self.logger.info("Using cached text for unchanged PDF")
+                return cached
+        
+        text = self._extract_text_uncached(pdf_path_str, use_ocr_fallback)
+        if cache_key is not None:
+            get_result_cache().set("extracted_text", cache_key, text)
+        return text
+    
+    def _extract_text_uncached(self, pdf_path_str: str, use_ocr_fallback: bool) -> str:
+        """Extract selectable text, falling back to OCR for scanned documents."""
+        import fitz  # PyMuPDF
         
         try:
-            # First, try extracting selectable text
-            text = extract_text_from_pdf(pdf_path_str)
+            doc = fitz.open(pdf_path_str)
+        except Exception as e:
+            raise InputProcessingError(pdf_path_str, "Failed to open PDF", e)
+        
+        # The text pass and the OCR fallback share one open document instead of
+        # parsing the file again
+        with doc:
+            try:
+                # First, try extracting selectable text
+                text = _text_from_doc(doc, pdf_path_str, self.config.PDF_MARGIN_RATIO)
+            except Exception as e:
+                if not use_ocr_fallback:
+                    raise InputProcessingError(pdf_path_str, "Failed to extract PDF text", e)
+                self.logger.warning(f"Text extraction failed, trying OCR: {e}")
+                try:
+                    return self._extract_with_ocr(pdf_path_str, doc)
+                except Exception as ocr_e:
+                    raise InputProcessingError(pdf_path_str, "Both text and OCR extraction failed", ocr_e)
             
             # Check if text extraction was successful
-            if text.strip() and len(text.strip()) > 50:
+            if _has_meaningful_text(text, 50):
                 self.logger.info("Successfully extracted selectable text from PDF")
                 return text
             
             # If text is minimal or empty, use OCR fallback
             if use_ocr_fallback:
                 self.logger.info("Minimal text found, using OCR fallback")
-                return self._extract_with_ocr(pdf_path_str)
-            else:
-                return text
-                
-        except Exception as e:
-            if use_ocr_fallback:
-                self.logger.warning(f"Text extraction failed, trying OCR: {e}")
-                try:
-                    return self._extract_with_ocr(pdf_path_str)
-                except Exception as ocr_e:
-                    raise InputProcessingError(pdf_path_str, "Both text and OCR extraction failed", ocr_e)
-            else:
-                raise
+                return self._extract_with_ocr(pdf_path_str, doc)
+            return text
     
-    def _extract_with_ocr(self, pdf_path: str) -> str:
-        """Extract text using OCR by converting PDF pages to images."""
+    def _extract_with_ocr(self, pdf_path: str, doc: Optional['fitz.Document'] = None) -> str:
+        """Extract text using OCR by converting PDF pages to images.
+        
+        ``doc`` may be the already open document for pdf_path, to avoid
+        opening the file again.
+        """
+        if doc is None:
+            import fitz  # PyMuPDF
+            
+            try:
+                doc = fitz.open(pdf_path)
+            except Exception as e:
+                raise OCRError(pdf_path, self.languages, e)
+            with doc:
+                return self._extract_with_ocr(pdf_path, doc)
+        
         try:
-            text_parts: List[str] = []
+            ocr_reader = self.ocr_reader
+            config = self.config
+            page_count = doc.page_count
             
-            # Use ModelManager for OCR reader
-            ocr_reader = get_ocr_reader(self.languages)
+            # Batches are independent and EasyOCR releases the GIL inside torch,
+            # so recognizing them on a thread pool overlaps the heavy work. On
+            # CPU each batch already uses every core through torch's intra-op
+            # threads, so concurrent batches would only oversubscribe them
+            auto_workers = (os.cpu_count() or 1) if cuda_available() else 1
+            recognize_workers = config.OCR_MAX_WORKERS or auto_workers
             
-            with fitz.open(pdf_path) as doc:
-                for page_num in range(len(doc)):
-                    page = doc[page_num]
-                    
-                    # Convert page to image
-                    pix = page.get_pixmap() # type: ignore
-                    img_data = pix.tobytes("png")
-                    
-                    # Use OCR on the image
-                    results = ocr_reader.readtext(img_data)
-                    
-                    # Extract text using config threshold
-                    page_text: List[str] = []
-                    for (bbox, text, confidence) in results:
-                        if float(confidence) > self.config.OCR_CONFIDENCE_THRESHOLD:
-                            page_text.append(text)
-                    
-                    if page_text:
-                        text_parts.append(" ".join(page_text))
+            # Pages are rendered and recognized a window at a time, so at most
+            # two windows of page images (the one being recognized and the next
+            # one being rendered) are held instead of the whole document
+            window_size = config.OCR_BATCH_SIZE * recognize_workers
+            windows = [range(start, min(start + window_size, page_count)) for start in range(0, page_count, window_size)]
+            render_workers = min(config.OCR_MAX_WORKERS or os.cpu_count() or 1, window_size)
             
-            return "\n".join(text_parts)
+            # Write pages straight into one buffer, one line per page with text
+            buffer = io.StringIO()
+            threshold = config.OCR_CONFIDENCE_THRESHOLD
+            render_pool = _page_worker_pool(render_workers)
+            with ThreadPoolExecutor(max_workers=recognize_workers) as recognize_pool:
+                try:
+                    pending = self._render_window(doc, pdf_path, windows[0], render_pool, render_workers) if windows else None
+                    for index in range(len(windows)):
+                        images = pending()
+                        # Render the next window while this one is recognized
+                        if index + 1 < len(windows):
+                            pending = self._render_window(doc, pdf_path, windows[index + 1], render_pool, render_workers)
+                        
+                        for results in self._recognize_pages(ocr_reader, images, recognize_pool):
+                            page_text = _filter_ocr_results(results, threshold)
+                            if page_text:
+                                if buffer.tell():
+                                    buffer.write("\n")
+                                buffer.write(" ".join(page_text))
+                        # Drop this window's page images before the next is rendered
+                        del images
+                finally:
+                    if render_pool is not None:
+                        render_pool.shutdown(cancel_futures=True)
+            
+            return buffer.getvalue()
             
         except Exception as e:
             self.logger.error(f"OCR extraction failed: {e}")
             raise OCRError(pdf_path, self.languages, e)
+    
+    def _render_window(self, doc: 'fitz.Document', pdf_path: str, pages: range,
+                       pool: Optional[ProcessPoolExecutor], num_workers: int) -> Callable[[], List['np.ndarray']]:
+        """Start rendering pages to grayscale arrays; the returned callable waits for them.
+        
+        With a worker pool the pages are split across processes and rendering
+        starts immediately; without one they are rendered in-process on call.
+        """
+        dpi = self.config.OCR_RENDER_DPI
+        if pool is None:
+            return lambda: render_doc_pages(doc, pages, dpi)
+        
+        futures = [pool.submit(render_page_range, pdf_path, part, dpi) for part in _split_pages(pages, num_workers)]
+        return lambda: [image for future in futures for image in future.result()]
+    
+    def _recognize_pages(self, ocr_reader: 'easyocr.Reader', images: List['np.ndarray'],
+                         executor: ThreadPoolExecutor) -> List[list]:
+        """Recognize page images in batches, returning the OCR results of each page in order."""
+        shapes = [image.shape for image in images]
+        
+        # readtext_batched needs equally sized images, so batch pages of
+        # similar size and resize the few that differ to the batch maximum
+        batches = self._group_pages_by_shape(shapes, self.config.OCR_BATCH_SIZE)
+        
+        def recognize(page_indices: List[int]) -> List[list]:
+            batch_shapes = {shapes[i][:2] for i in page_indices}
+            resize: dict = {}
+            if len(batch_shapes) > 1:
+                resize = {'n_height': max(h for h, _ in batch_shapes), 'n_width': max(w for _, w in batch_shapes)}
+            return ocr_reader.readtext_batched(
+                [images[i] for i in page_indices],
+                batch_size=self.config.OCR_BATCH_SIZE,
+                **resize
+            )
+        
+        results_per_page: List[list] = [[] for _ in images]
+        for page_indices, batch_results in zip(batches, executor.map(recognize, batches)):
+            for page_idx, results in zip(page_indices, batch_results):
+                results_per_page[page_idx] = results
+        return results_per_page
+    
+    @staticmethod
+    def _group_pages_by_shape(shapes: List[tuple], batch_size: int) -> List[List[int]]:
+        """Group page indices into batches of at most batch_size similarly sized pages.
+        
+        Pages are bucketed by height and width rounded to 64 px, so scans that
+        differ by a few pixels still share a batch instead of running alone.
+        """
+        by_shape: dict = {}
+        for page_idx, (height, width, *_) in enumerate(shapes):
+            by_shape.setdefault((round(height / 64), round(width / 64)), []).append(page_idx)
+        
+        return [
+            indices[start:start + batch_size]
+            for indices in by_shape.values()
+            for start in range(0, len(indices), batch_size)
+        ]
+
+
+# Longest path accepted by common filesystems (Linux PATH_MAX)
+_MAX_PATH_LENGTH = 4096
+
+
+def _could_be_path(input_source: str) -> bool:
+    """Cheap check that rules out raw text before touching the filesystem."""
+    return len(input_source) < _MAX_PATH_LENGTH and '\n' not in input_source
+
+
+def _stat_if_exists(path: str) -> Optional[os.stat_result]:
+    """Stat path once, returning None where os.path.exists would be False."""
+    try:
+        return os.stat(path)
+    except (OSError, ValueError):
+        return None
 
 
 def process_input(input_source: str, languages: Optional[List[str]] = None) -> str:
@@ -186,12 +443,13 @@ def process_input(input_source: str, languages: Optional[List[str]] = None) -> s
     config = get_config()
     if languages is None:
         languages = config.OCR_DEFAULT_LANGUAGES
-        
-    logger = getLogger(__name__)
     
-    # Check if input_source is a file path
-    if os.path.exists(input_source):
-        file_type = detect_file_type(input_source)
+    # Check if input_source is a file path; long or multi-line input cannot be
+    # a path, so raw text skips the filesystem lookup entirely
+    file_stat = _stat_if_exists(input_source) if _could_be_path(input_source) else None
+    if file_stat is not None:
+        # Existence is already known, so classify by name without a second stat
+        file_type = FilePatterns.file_type(input_source)
         
         logger.info(f"Processing file: {input_source} (type: {file_type})")
         
@@ -205,8 +463,8 @@ def process_input(input_source: str, languages: Optional[List[str]] = None) -> s
             return extract_text_from_image(input_source, languages=languages)
         
         elif file_type == 'text':
-            # Read text file directly
-            return read_text_file(input_source)
+            # Read text file directly, reusing the stat from the existence check
+            return read_text_file(input_source, file_stat)
         
         else:
             raise FileTypeError(input_source, file_type)
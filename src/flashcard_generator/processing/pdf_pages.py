@@ -0,0 +1,64 @@
+"""
+Per-page PDF work run in worker processes.
+
+Workers start from a fresh interpreter and import these functions by name.
+The functions need only PyMuPDF and numpy, and the package imports torch and
+transformers only when a model is loaded, so a worker starts without them.
+"""
+
+import io
+from typing import TYPE_CHECKING, List
+
+if TYPE_CHECKING:
+    import fitz
+    import numpy as np
+
+
+def render_page_range(pdf_path: str, page_numbers: range, dpi: int) -> List['np.ndarray']:
+    """Open a PDF and render a range of its pages (runs in worker processes)."""
+    import fitz  # PyMuPDF
+    
+    # PyMuPDF holds the GIL while rendering and is not thread-safe, so pages are
+    # rendered in separate processes, each with its own document
+    with fitz.open(pdf_path) as doc:
+        return render_doc_pages(doc, page_numbers, dpi)
+
+
+def render_doc_pages(doc: 'fitz.Document', page_numbers: range, dpi: int) -> List['np.ndarray']:
+    """Render pages of an open PDF document to HxW grayscale arrays."""
+    import fitz  # PyMuPDF
+    import numpy as np
+    
+    # EasyOCR recognizes on grayscale anyway, so rendering straight to one
+    # channel without alpha cuts pixmap and transfer size by 3x versus RGB
+    arrays: List['np.ndarray'] = []
+    for page_number in page_numbers:
+        pix = doc[page_number].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False) # type: ignore
+        arrays.append(np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width))
+    return arrays
+
+
+def text_from_page_range(pdf_path: str, page_numbers: range, margin_ratio: float) -> str:
+    """Open a PDF and extract the text of a range of its pages (runs in worker processes)."""
+    import fitz  # PyMuPDF
+    
+    with fitz.open(pdf_path) as doc:
+        return text_from_pages(doc, page_numbers, margin_ratio)
+
+
+def text_from_pages(doc: 'fitz.Document', page_numbers: range, margin_ratio: float) -> str:
+    """Extract the selectable text of a range of pages of an open PDF."""
+    # Stream pages into one buffer instead of holding a list of page strings;
+    # a form feed marks each page boundary for downstream segmentation
+    buffer = io.StringIO()
+    for page_number in page_numbers:
+        page = doc[page_number]
+        # Blocks come in reading order with their position, so running
+        # headers, footers and page numbers can be dropped at the source
+        top = page.rect.y0 + page.rect.height * margin_ratio
+        bottom = page.rect.y1 - page.rect.height * margin_ratio
+        for x0, y0, x1, y1, text, block_no, block_type in page.get_text("blocks", sort=True): # type: ignore
+            if block_type == 0 and y0 < bottom and y1 > top:
+                buffer.write(text)
+        buffer.write("\f")
+    return buffer.getvalue()
@@ -0,0 +1,73 @@
+"""
+Disk-backed Result Cache for Flashcard Generator
+
+Stores generated results as JSON files keyed by a hash of their inputs, so
+re-running the pipeline on the same text skips model inference entirely.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Optional
+
+from ..config.settings import get_config
+from . import serialization
+
+
+class ResultCache:
+    """Content-addressed JSON cache, one file per entry, grouped by namespace."""
+    
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = Path(cache_dir or get_config().CACHE_DIR).expanduser()
+        self.logger = logging.getLogger(__name__)
+    
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Hash JSON-serializable inputs into a stable cache key."""
+        payload = json.dumps(parts, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+    
+    def _entry_path(self, namespace: str, key: str) -> Path:
+        return self.cache_dir / namespace / f"{key}.json"
+    
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss or unreadable entry."""
+        try:
+            return serialization.loads(self._entry_path(namespace, key).read_bytes())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.logger.debug(f"Ignoring unreadable cache entry {namespace}/{key}: {e}")
+            return None
+    
+    def set(self, namespace: str, key: str, value: Any) -> None:
+        """Store a value; failures are logged since the cache is best-effort."""
+        path = self._entry_path(namespace, key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_bytes(serialization.dumps(value))
+            # Atomic rename so concurrent readers never see a partial entry
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self.logger.warning(f"Could not write cache entry {namespace}/{key}: {e}")
+    
+    def clear(self, namespace: Optional[str] = None) -> None:
+        """Remove one namespace, or every cached entry."""
+        target = self.cache_dir / namespace if namespace else self.cache_dir
+        shutil.rmtree(target, ignore_errors=True)
+
+
+# Global cache instance, created on first use
+_cache: Optional[ResultCache] = None
+
+
+def get_result_cache() -> ResultCache:
+    """Get the global result cache instance."""
+    global _cache
+    if _cache is None:
+        _cache = ResultCache()
+    return _cache
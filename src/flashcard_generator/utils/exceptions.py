@@ -12,17 +12,33 @@ class FlashcardGeneratorError(Exception):
     """Base exception for flashcard generator."""
     
     def __init__(self, message: str, details: Optional[str] = None, original_error: Optional[Exception] = None):
+        # Only the short message goes into args; the full text is composed in
+        # __str__, so it is only built when the error is actually displayed
+        super().__init__(message)
         self.message = message
         self.details = details
         self.original_error = original_error
-        
-        full_message = message
-        if details:
-            full_message += f" Details: {details}"
-        if original_error:
-            full_message += f" Original error: {str(original_error)}"
-            
-        super().__init__(full_message)
+    
+    def __str__(self) -> str:
+        full_message = self.message
+        if self.details:
+            full_message += f" Details: {self.details}"
+        if self.original_error:
+            full_message += f" Original error: {self.original_error}"
+        return full_message
+    
+    def __reduce__(self):
+        # Subclass constructors take different arguments than args holds, so
+        # rebuild from the instance attributes (e.g. when returned from a worker process)
+        return _restore_error, (self.__class__, self.message, self.__dict__)
+
+
+def _restore_error(cls: type, message: str, state: dict) -> FlashcardGeneratorError:
+    """Recreate a pickled FlashcardGeneratorError without calling its __init__."""
+    error = cls.__new__(cls)
+    error.args = (message,)
+    error.__dict__.update(state)
+    return error
 
 
 class InputProcessingError(FlashcardGeneratorError):
@@ -6,11 +6,20 @@ Implements singleton pattern with lazy loading for efficient resource management
 """
 
 import logging
-import spacy
-import easyocr
-from transformers import pipeline
-from typing import Dict, List, Optional, Any
-from threading import Lock
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Any, Sequence, Tuple
+from threading import Lock, Thread
+
+from ..config.settings import get_config
+
+if TYPE_CHECKING:
+    # easyocr pulls in opencv and its model registry; only import it when OCR is used
+    import easyocr
+    # spaCy's import alone takes hundreds of milliseconds; only import it when
+    # a pipeline is first loaded
+    import spacy
+    # torch and transformers take seconds to import; text-only and --help runs
+    # never need them, so they are imported when a model is first loaded
+    import torch
 
 
 class ModelManager:
@@ -24,6 +33,8 @@ class ModelManager:
             raise RuntimeError("ModelManager is a singleton. Use get_instance() instead.")
         
         self._models: Dict[str, Any] = {}
+        self._load_locks: Dict[str, Lock] = {}
+        self._load_locks_guard = Lock()
         self.logger = logging.getLogger(__name__)
         
     @classmethod
@@ -35,55 +46,220 @@ class ModelManager:
                     cls._instance = cls()
         return cls._instance
     
-    def get_nlp_model(self, model_name: str = "en_core_web_sm") -> spacy.Language:  # type: ignore
-        """Get spaCy NLP model with lazy loading."""
+    def _get_or_load(self, cache_key: str, loader: Callable[[], Any]) -> Any:
+        """Return a cached model, loading it at most once even across threads."""
+        if cache_key not in self._models:
+            with self._load_locks_guard:
+                key_lock = self._load_locks.setdefault(cache_key, Lock())
+            
+            # Concurrent callers for the same model wait for the first load
+            with key_lock:
+                if cache_key not in self._models:
+                    self._models[cache_key] = loader()
+        
+        return self._models[cache_key]
+    
+    def get_nlp_model(self, model_name: Optional[str] = None) -> 'spacy.Language':
+        """Get a spaCy pipeline for sentence splitting with lazy loading.
+        
+        Only sentence boundaries are used, so the parser, tagger, NER and
+        lemmatizer are never loaded; the trained senter (or the rule-based
+        sentencizer, for models without one) sets the boundaries instead.
+        A model name of the form "blank:<lang>" builds a blank pipeline with
+        just the sentencizer, which loads in milliseconds and needs no
+        downloaded model. ``model_name`` defaults to config.SPACY_MODEL_NAME.
+        """
+        model_name = model_name or get_config().SPACY_MODEL_NAME
         cache_key = f"spacy_{model_name}"
         
-        if cache_key not in self._models:
+        def load() -> 'spacy.Language':
             self.logger.info(f"Loading spaCy model: {model_name}")
             try:
-                self._models[cache_key] = spacy.load(model_name)
+                import spacy
+                if model_name.startswith("blank:"):
+                    nlp = spacy.blank(model_name[len("blank:"):])
+                    nlp.add_pipe("sentencizer")
+                    self.logger.info(f"✅ Successfully loaded spaCy model: {model_name}")
+                    return nlp
+                
+                nlp = spacy.load(model_name, exclude=["parser", "tagger", "ner", "lemmatizer", "attribute_ruler"])
+                if "senter" in nlp.component_names:
+                    nlp.enable_pipe("senter")
+                else:
+                    nlp.add_pipe("sentencizer")
+                
+                # The shared tok2vec only feeds the excluded components in the
+                # stock pipelines; drop it unless something still listens to it
+                if "tok2vec" in nlp.pipe_names and not nlp.get_pipe("tok2vec").listening_components:
+                    nlp.remove_pipe("tok2vec")
                 self.logger.info(f"✅ Successfully loaded spaCy model: {model_name}")
+                return nlp
             except Exception as e:
                 self.logger.error(f"Failed to load spaCy model {model_name}: {e}")
                 raise RuntimeError(f"Could not load spaCy model '{model_name}'. "
                                  f"Install it with: python -m spacy download {model_name}")
         
-        return self._models[cache_key]
+        return self._get_or_load(cache_key, load)
+    
+    def get_ai_model(self, model_name: Optional[str] = None) -> Tuple[Any, Any]:
+        """Get the seq2seq model and its tokenizer with lazy loading."""
+        model_name = model_name or get_config().AI_MODEL_NAME
+        cache_key = f"seq2seq_{model_name.replace('/', '_')}"
+        
+        def load() -> Tuple[Any, Any]:
+            self.logger.info(f"Loading AI model: {model_name}")
+            try:
+                tokenizer = self.get_ai_tokenizer(model_name)
+                if get_config().AI_BACKEND == "onnx":
+                    model = self._load_onnx_seq2seq(model_name)
+                else:
+                    model = self._load_seq2seq(model_name)
+                    model.eval()
+                    if get_config().ENABLE_TORCH_COMPILE:
+                        self._compile_for_generation(model)
+                        self._warm_up_generation(model, tokenizer)
+                self.logger.info(f"✅ Successfully loaded AI model: {model_name}")
+                return model, tokenizer
+            except Exception as e:
+                self.logger.error(f"Failed to load AI model {model_name}: {e}")
+                raise RuntimeError(f"Could not load AI model '{model_name}'. "
+                                 f"Check your internet connection and available disk space.")
+        
+        return self._get_or_load(cache_key, load)
+    
+    def get_ai_tokenizer(self, model_name: Optional[str] = None) -> Any:
+        """Get the tokenizer of an AI model without loading its weights."""
+        model_name = model_name or get_config().AI_MODEL_NAME
+        cache_key = f"tokenizer_{model_name.replace('/', '_')}"
+        
+        def load() -> Any:
+            try:
+                from transformers import AutoTokenizer
+                return AutoTokenizer.from_pretrained(model_name)
+            except Exception as e:
+                self.logger.error(f"Failed to load tokenizer {model_name}: {e}")
+                raise RuntimeError(f"Could not load tokenizer for '{model_name}'. "
+                                 f"Check your internet connection and available disk space.")
+        
+        return self._get_or_load(cache_key, load)
+    
+    def _load_seq2seq(self, model_name: str) -> Any:
+        """Load seq2seq weights with the configured dtype, quantization and device."""
+        import torch
+        from transformers import AutoModelForSeq2SeqLM
+        
+        config = get_config()
+        use_cuda = torch.cuda.is_available()
+        
+        if config.AI_QUANTIZATION == "int8" and use_cuda:
+            # Weight-only INT8 via bitsandbytes halves bytes moved per decode step
+            from transformers import BitsAndBytesConfig
+            return AutoModelForSeq2SeqLM.from_pretrained(
+                model_name,
+                quantization_config=BitsAndBytesConfig(load_in_8bit=True),
+                device_map="auto",
+            )
+        
+        if config.AI_QUANTIZATION == "int8":
+            # bitsandbytes needs CUDA; on CPU use PyTorch dynamic INT8 for Linear layers
+            model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+            return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_name, torch_dtype=self._resolve_dtype(config.AI_TORCH_DTYPE))
+        return model.to("cuda") if use_cuda else model
+    
+    def _load_onnx_seq2seq(self, model_name: str) -> Any:
+        """Export the model to ONNX Runtime, which fuses the graph for faster CPU inference."""
+        try:
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        except ImportError:
+            raise RuntimeError("AI_BACKEND 'onnx' requires optimum with ONNX Runtime. "
+                             "Install it with: pip install optimum[onnxruntime]")
+        
+        provider = "CUDAExecutionProvider" if cuda_available() else "CPUExecutionProvider"
+        # export=True converts the PyTorch checkpoint on first load
+        return ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True, provider=provider)
+    
+    @staticmethod
+    def _compile_for_generation(model: Any) -> None:
+        """Use a static KV cache and compile forward to cut per-step dispatch overhead."""
+        # A static cache keeps tensor shapes fixed across decode steps, which
+        # lets the compiled forward be replayed instead of re-traced
+        import torch
+        
+        model.generation_config.cache_implementation = "static"
+        model.forward = torch.compile(model.forward, mode="reduce-overhead")
+    
+    @staticmethod
+    def _warm_up_generation(model: Any, tokenizer: Any) -> None:
+        """Run one tiny generate so compilation happens at load time.
+        
+        Loading usually runs on the background preload thread, which then
+        absorbs the first (and most expensive) compile instead of the first
+        real batch.
+        """
+        import torch
+        
+        inputs = tokenizer(["Warm up."], return_tensors="pt").to(model.device)
+        with torch.inference_mode():
+            model.generate(**inputs, max_new_tokens=2, do_sample=False)
+    
+    @staticmethod
+    def _resolve_dtype(name: str) -> 'torch.dtype':
+        """Map AI_TORCH_DTYPE to a torch dtype; "auto" picks bf16 on capable GPUs."""
+        import torch
+        
+        if name == "auto":
+            if torch.cuda.is_available() and torch.cuda.is_bf16_supported():
+                return torch.bfloat16
+            return torch.float32
+        return {"bfloat16": torch.bfloat16, "float16": torch.float16, "float32": torch.float32}[name]
     
     def get_ai_generator(self, model_name: str = "google/flan-t5-base") -> Any:
-        """Get AI text generation model with lazy loading."""
+        """Get AI text generation pipeline with lazy loading."""
         cache_key = f"generator_{model_name.replace('/', '_')}"
         
-        if cache_key not in self._models:
+        def load() -> Any:
             self.logger.info(f"Loading AI generator model: {model_name}")
             try:
-                self._models[cache_key] = pipeline("text2text-generation", model=model_name)
+                # Share weights with get_ai_model instead of loading a second copy
+                from transformers import pipeline
+                model, tokenizer = self.get_ai_model(model_name)
+                generator = pipeline("text2text-generation", model=model, tokenizer=tokenizer)
                 self.logger.info(f"✅ Successfully loaded AI generator: {model_name}")
+                return generator
             except Exception as e:
                 self.logger.error(f"Failed to load AI generator {model_name}: {e}")
                 raise RuntimeError(f"Could not load AI model '{model_name}'. "
                                  f"Check your internet connection and available disk space.")
         
-        return self._models[cache_key]
+        return self._get_or_load(cache_key, load)
     
-    def get_ocr_reader(self, languages: List[str] = ['en']) -> easyocr.Reader:
+    def get_ocr_reader(self, languages: Optional[Sequence[str]] = None) -> 'easyocr.Reader':
         """Get EasyOCR reader with lazy loading and language caching."""
-        cache_key = f"ocr_{'_'.join(sorted(languages))}"
+        # Order and duplicates don't change the reader, so ['fr', 'en'] and
+        # ['en', 'fr'] share one cached instance
+        languages = tuple(sorted(set(languages or get_config().OCR_DEFAULT_LANGUAGES)))
+        cache_key = f"ocr_{'_'.join(languages)}"
         
-        if cache_key not in self._models:
+        def load() -> 'easyocr.Reader':
             self.logger.info(f"Loading EasyOCR reader for languages: {languages}")
             try:
-                self._models[cache_key] = easyocr.Reader(languages)
+                import easyocr
+                use_gpu = cuda_available()
+                # Pages are batched by shape, so cuDNN can autotune once per
+                # page size and reuse the fastest kernels for every batch
+                reader = easyocr.Reader(list(languages), gpu=use_gpu, cudnn_benchmark=use_gpu)
                 self.logger.info(f"✅ Successfully loaded EasyOCR for: {languages}")
+                return reader
             except Exception as e:
                 self.logger.error(f"Failed to load EasyOCR for {languages}: {e}")
                 raise RuntimeError(f"Could not load EasyOCR for languages '{languages}'. "
                                  f"Check your internet connection and available disk space.")
         
-        return self._models[cache_key]
+        return self._get_or_load(cache_key, load)
     
-    def preload_models(self, include_ocr: bool = False, ocr_languages: List[str] = ['en']) -> None:
+    def preload_models(self, include_ocr: bool = False, ocr_languages: Optional[Sequence[str]] = None) -> None:
         """Preload all models for faster runtime performance."""
         self.logger.info("Preloading models for optimal performance...")
         
@@ -91,8 +267,9 @@ class ModelManager:
             # Load NLP model
             self.get_nlp_model()
             
-            # Load AI generator
-            self.get_ai_generator()
+            # Load AI models
+            for model_name in self._ai_model_names():
+                self.get_ai_model(model_name)
             
             # Optionally load OCR (can be memory intensive)
             if include_ocr:
@@ -104,6 +281,29 @@ class ModelManager:
             self.logger.warning(f"Model preloading failed: {e}")
             raise
     
+    @staticmethod
+    def _ai_model_names() -> List[str]:
+        """Distinct configured AI models: the main model, then the answer model."""
+        config = get_config()
+        names = [config.AI_MODEL_NAME]
+        if config.AI_ANSWER_MODEL_NAME and config.AI_ANSWER_MODEL_NAME != config.AI_MODEL_NAME:
+            names.append(config.AI_ANSWER_MODEL_NAME)
+        return names
+    
+    def preload_in_background(self) -> Thread:
+        """Start loading the AI models on a daemon thread to hide cold start."""
+        def preload() -> None:
+            try:
+                for model_name in self._ai_model_names():
+                    self.get_ai_model(model_name)
+            except Exception as e:
+                # The foreground call will retry and report the error
+                self.logger.warning(f"Background model preloading failed: {e}")
+        
+        thread = Thread(target=preload, name="model-preload", daemon=True)
+        thread.start()
+        return thread
+    
     def get_memory_usage(self) -> Dict[str, str]:
         """Get approximate memory usage of loaded models."""
         import sys
@@ -112,7 +312,10 @@ class ModelManager:
         for model_name, model in self._models.items():
             # Rough size estimation
             size_bytes = sys.getsizeof(model)
-            if hasattr(model, 'model') and hasattr(model.model, 'num_parameters'):
+            if isinstance(model, tuple) and hasattr(model[0], 'get_memory_footprint'):
+                # (model, tokenizer) pairs report their actual parameter storage
+                size_bytes = model[0].get_memory_footprint()
+            elif hasattr(model, 'model') and hasattr(model.model, 'num_parameters'):
                 # For transformer models, estimate based on parameters
                 params = model.model.num_parameters()
                 size_bytes = params * 4  # Assume 4 bytes per parameter (float32)
@@ -137,7 +340,7 @@ class ModelManager:
 
 
 # Convenience functions for backward compatibility
-def get_nlp_model() -> spacy.Language:  # type: ignore
+def get_nlp_model() -> 'spacy.Language':
     """Get spaCy model via ModelManager."""
     return ModelManager.get_instance().get_nlp_model()
 
@@ -145,6 +348,20 @@ def get_ai_generator() -> Any:
     """Get AI generator via ModelManager."""
     return ModelManager.get_instance().get_ai_generator()
 
-def get_ocr_reader(languages: List[str] = ['en']) -> easyocr.Reader:
+def get_ai_model(model_name: Optional[str] = None) -> Tuple[Any, Any]:
+    """Get AI model and tokenizer via ModelManager."""
+    return ModelManager.get_instance().get_ai_model(model_name)
+
+def get_ai_tokenizer(model_name: Optional[str] = None) -> Any:
+    """Get AI tokenizer via ModelManager."""
+    return ModelManager.get_instance().get_ai_tokenizer(model_name)
+
+def get_ocr_reader(languages: Optional[Sequence[str]] = None) -> 'easyocr.Reader':
     """Get OCR reader via ModelManager."""
     return ModelManager.get_instance().get_ocr_reader(languages)
+
+def cuda_available() -> bool:
+    """Whether models are placed on a CUDA device."""
+    import torch
+    
+    return torch.cuda.is_available()
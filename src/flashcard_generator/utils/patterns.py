@@ -6,7 +6,10 @@ for improved performance and maintainability.
 """
 
 import re
-from typing import Pattern
+from functools import lru_cache
+from typing import FrozenSet, Iterator, Pattern
+
+from . import serialization
 
 
 class TextPatterns:
@@ -33,16 +36,53 @@ class TextPatterns:
     SENTENCE_BOUNDARY: Pattern[str] = re.compile(r'(?<=[.!?])\s+')
     
     # AI generation patterns
-    JSON_ARRAY: Pattern[str] = re.compile(r'\[.*?\]', re.DOTALL)
+    QUESTION_SPAN: Pattern[str] = re.compile(r'[^?"\[\],\n]+\?')
     GENERIC_QUESTION: Pattern[str] = re.compile(r'^question\s*\d+\?$', re.IGNORECASE)
-    
-    # File extension patterns
-    PDF_EXTENSION: Pattern[str] = re.compile(r'\.pdf$', re.IGNORECASE)
-    IMAGE_EXTENSIONS: Pattern[str] = re.compile(
-        r'\.(jpg|jpeg|png|bmp|tiff|webp)$', 
-        re.IGNORECASE
-    )
-    TEXT_EXTENSIONS: Pattern[str] = re.compile(r'\.(txt|md)$', re.IGNORECASE)
+
+
+# Bound pattern methods for the TextCleaner hot paths: one global lookup per
+# call instead of resolving the class, the pattern and the method each time
+_html_sub = TextPatterns.HTML_TAGS.sub
+_non_word_sub = TextPatterns.NON_WORD_CHARS.sub
+# The ASCII characters NON_WORD_CHARS removes, as a str.translate delete-table
+_ASCII_NON_WORD_TABLE = str.maketrans(
+    '', '', ''.join(filter(TextPatterns.NON_WORD_CHARS.match, map(chr, range(128))))
+)
+_procedural_search = TextPatterns.PROCEDURAL.search
+_boilerplate_search = TextPatterns.BOILERPLATE.search
+_page_number_match = TextPatterns.PAGE_NUMBER.match
+_standalone_number_match = TextPatterns.STANDALONE_NUMBER.match
+_sentence_finditer = TextPatterns.SENTENCE_BOUNDARY.finditer
+_generic_question_match = TextPatterns.GENERIC_QUESTION.match
+
+
+# Quotes plus every character \s matches, so str.strip removes exactly what
+# the former ^[\s'"]+|[\s'"]+$ regex did, without a regex scan
+_EDGE_CHARS = (
+    '\'" \t\n\x0b\x0c\r\x1c\x1d\x1e\x1f\x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004'
+    '\u2005\u2006\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000'
+)
+
+
+# Content predicates are memoized: running headers, footers and boilerplate
+# lines recur on every page, and generated questions repeat across candidates,
+# so repeats cost a dict lookup instead of another regex scan
+@lru_cache(maxsize=4096)
+def is_procedural_content(text: str) -> bool:
+    """Check if text contains procedural content."""
+    return _procedural_search(text) is not None
+
+
+@lru_cache(maxsize=4096)
+def is_boilerplate_content(text: str) -> bool:
+    """Check if text contains boilerplate content."""
+    return _boilerplate_search(text) is not None
+
+
+@lru_cache(maxsize=4096)
+def is_generic_question(question: str) -> bool:
+    """Check if question is generic/template-like."""
+    return _generic_question_match(question) is not None
 
 
 class TextCleaner:
@@ -51,42 +91,65 @@ class TextCleaner:
     @staticmethod
     def remove_html_tags(text: str) -> str:
         """Remove HTML tags from text."""
-        return TextPatterns.HTML_TAGS.sub('', text)
+        return _html_sub('', text)
     
     @staticmethod
     def normalize_whitespace(text: str) -> str:
         """Normalize whitespace in text."""
-        return TextPatterns.WHITESPACE.sub(' ', text).strip()
+        # str.split() splits on the same characters as \s and drops the ends,
+        # collapsing runs and stripping in one C-level pass
+        return ' '.join(text.split())
     
     @staticmethod
     def remove_non_word_chars(text: str) -> str:
         """Remove non-word characters except basic punctuation."""
-        return TextPatterns.NON_WORD_CHARS.sub('', text)
-    
-    @staticmethod
-    def is_procedural_content(text: str) -> bool:
-        """Check if text contains procedural content."""
-        return bool(TextPatterns.PROCEDURAL.search(text))
+        # For ASCII text a table lookup per character does the same removal
+        # without the regex engine; isascii is a flag check on str
+        if text.isascii():
+            return text.translate(_ASCII_NON_WORD_TABLE)
+        return _non_word_sub('', text)
     
-    @staticmethod
-    def is_boilerplate_content(text: str) -> bool:
-        """Check if text contains boilerplate content."""
-        return bool(TextPatterns.BOILERPLATE.search(text))
+    is_procedural_content = staticmethod(is_procedural_content)
+    is_boilerplate_content = staticmethod(is_boilerplate_content)
     
     @staticmethod
     def is_page_number(text: str) -> bool:
         """Check if text is a page number."""
-        return bool(TextPatterns.PAGE_NUMBER.match(text.strip()))
+        return bool(_page_number_match(text.strip()))
     
     @staticmethod
     def is_standalone_number(text: str) -> bool:
         """Check if text is just a standalone number."""
-        return bool(TextPatterns.STANDALONE_NUMBER.match(text.strip()))
+        return bool(_standalone_number_match(text.strip()))
+    
+    @staticmethod
+    def is_header_footer_line(text: str) -> bool:
+        """Check if text is a page number or a standalone number."""
+        # Same lines as PAGE_NUMBER or STANDALONE_NUMBER (str.isdecimal is
+        # exactly \d), but most lines fail on the first character without
+        # entering the regex engine
+        s = text.strip()
+        if s[:1] == 'P':
+            return s[:5] == 'Page ' and s[5:].isdecimal()
+        return s.isdecimal()
+    
+    @staticmethod
+    def iter_sentences(text: str) -> Iterator[str]:
+        """Yield sentences split by regex, without materializing the split list."""
+        start = 0
+        for boundary in _sentence_finditer(text):
+            sentence = text[start:boundary.start()].strip()
+            if sentence:
+                yield sentence
+            start = boundary.end()
+        tail = text[start:].strip()
+        if tail:
+            yield tail
     
     @staticmethod
     def split_sentences(text: str) -> list[str]:
         """Split text into sentences using regex."""
-        return [s.strip() for s in TextPatterns.SENTENCE_BOUNDARY.split(text) if s.strip()]
+        return list(TextCleaner.iter_sentences(text))
 
 
 class AIPatterns:
@@ -95,48 +158,116 @@ class AIPatterns:
     @staticmethod
     def extract_json_array(text: str) -> list:
         """Extract JSON array from AI-generated text."""
-        import json
-        
-        # Try direct JSON parsing first
-        try:
-            data = json.loads(text)
-            if isinstance(data, list):
-                return data
-        except json.JSONDecodeError:
-            pass
+        # Try direct JSON parsing first; only text that starts like an array can
+        # parse to a list, so skip the raise-and-catch for everything else
+        if text.lstrip().startswith('['):
+            try:
+                data = serialization.loads(text)
+                if isinstance(data, list):
+                    return data
+            except serialization.JSONDecodeError:
+                pass
         
-        # Fallback to regex extraction
-        match = TextPatterns.JSON_ARRAY.search(text)
-        if match:
+        # Fallback to the first balanced [...] span in the text
+        candidate = AIPatterns.find_json_array(text)
+        if candidate:
             try:
-                data = json.loads(match.group(0))
+                data = serialization.loads(candidate)
                 if isinstance(data, list):
                     return data
-            except json.JSONDecodeError:
+            except serialization.JSONDecodeError:
                 pass
         
         return []
     
     @staticmethod
-    def is_generic_question(question: str) -> bool:
-        """Check if question is generic/template-like."""
-        return bool(TextPatterns.GENERIC_QUESTION.match(question))
+    def find_json_array(text: str) -> str:
+        """Return the first balanced [...] span, ignoring brackets inside strings."""
+        start = text.find('[')
+        if start < 0:
+            return ''
+        
+        depth = 0
+        in_string = False
+        escaped = False
+        for i in range(start, len(text)):
+            char = text[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == '\\':
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == '[':
+                depth += 1
+            elif char == ']':
+                depth -= 1
+                if depth == 0:
+                    return text[start:i + 1]
+        
+        return ''
+    
+    @staticmethod
+    def extract_questions(text: str) -> list:
+        """Extract questions from AI output, tolerating malformed JSON."""
+        questions = AIPatterns.extract_json_array(text)
+        if questions:
+            return questions
+        
+        # Recover "?"-terminated spans from truncated or unquoted arrays
+        return [q.strip() for q in TextPatterns.QUESTION_SPAN.findall(text) if q.strip() != '?']
+    
+    @staticmethod
+    def strip_edge_quotes(text: str) -> str:
+        """Strip surrounding whitespace and quotes in a single pass."""
+        return text.strip(_EDGE_CHARS)
+    
+    is_generic_question = staticmethod(is_generic_question)
 
 
 class FilePatterns:
     """Patterns for file type detection."""
     
+    # Lowercase suffixes per supported input type; a set lookup on the suffix
+    # replaces regex searches and MIME database lookups
+    PDF_SUFFIXES: FrozenSet[str] = frozenset({'.pdf'})
+    IMAGE_SUFFIXES: FrozenSet[str] = frozenset({'.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.gif', '.webp'})
+    TEXT_SUFFIXES: FrozenSet[str] = frozenset({'.txt', '.md', '.csv', '.htm', '.html', '.xml', '.json'})
+    
+    @staticmethod
+    def suffix(filename: str) -> str:
+        """Return the lowercase extension of filename, including the dot."""
+        # rpartition is several times cheaper than os.path.splitext; a dot in a
+        # directory name yields a suffix containing '/', which matches no set
+        _, dot, extension = filename.rpartition('.')
+        return f".{extension}".lower() if dot else ''
+    
+    @staticmethod
+    def file_type(filename: str) -> str:
+        """Classify filename as pdf/image/text/unknown by its extension."""
+        suffix = FilePatterns.suffix(filename)
+        if suffix in FilePatterns.PDF_SUFFIXES:
+            return 'pdf'
+        elif suffix in FilePatterns.IMAGE_SUFFIXES:
+            return 'image'
+        elif suffix in FilePatterns.TEXT_SUFFIXES:
+            return 'text'
+        return 'unknown'
+    
     @staticmethod
     def is_pdf_file(filename: str) -> bool:
         """Check if filename indicates a PDF file."""
-        return bool(TextPatterns.PDF_EXTENSION.search(filename))
+        return FilePatterns.suffix(filename) in FilePatterns.PDF_SUFFIXES
     
     @staticmethod
     def is_image_file(filename: str) -> bool:
         """Check if filename indicates an image file."""
-        return bool(TextPatterns.IMAGE_EXTENSIONS.search(filename))
+        return FilePatterns.suffix(filename) in FilePatterns.IMAGE_SUFFIXES
     
     @staticmethod
     def is_text_file(filename: str) -> bool:
         """Check if filename indicates a text file."""
-        return bool(TextPatterns.TEXT_EXTENSIONS.search(filename))
+        return FilePatterns.suffix(filename) in FilePatterns.TEXT_SUFFIXES
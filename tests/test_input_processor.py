@@ -5,6 +5,7 @@ Test script for the PDF and OCR input processing functionality.
 This script tests the Phase 1 implementation of PDF & OCR integration.
 """
 
+import codecs
 import sys
 import os
 from flashcard_generator.processing.input_processor import (
@@ -87,6 +88,34 @@ def test_text_file_processing():
         except Exception as e:
             print(f"❌ Error reading test file: {e}")
 
+def test_text_file_encodings():
+    """Test that BOM-marked and non-UTF-8 text files decode correctly."""
+    print("\n=== Testing Text File Encodings ===")
+    
+    content = "Café résumé\nline two"
+    # Plain UTF-8, each byte order mark, and the latin-1 fallback for bytes
+    # that are not valid UTF-8
+    encoded = {
+        "utf-8": content.encode("utf-8"),
+        "utf-8-sig": content.encode("utf-8-sig"),
+        "utf-16-le": codecs.BOM_UTF16_LE + content.encode("utf-16-le"),
+        "utf-16-be": codecs.BOM_UTF16_BE + content.encode("utf-16-be"),
+        "utf-32-le": codecs.BOM_UTF32_LE + content.encode("utf-32-le"),
+        "utf-32-be": codecs.BOM_UTF32_BE + content.encode("utf-32-be"),
+        "latin-1": content.encode("latin-1"),
+    }
+    for encoding, data in encoded.items():
+        filename = f"test_{encoding}.txt"
+        try:
+            with open(filename, "wb") as f:
+                f.write(data)
+            text = read_text_file(filename)
+            assert text == content, (encoding, text)
+            print(f"✅ {encoding} file decoded correctly")
+        finally:
+            if os.path.exists(filename):
+                os.remove(filename)  # Clean up
+
 def test_pdf_extractor_class():
     """Test the PDFTextExtractor class."""
     print("\n=== Testing PDFTextExtractor Class ===")
@@ -126,6 +155,7 @@ def run_all_tests():
     try:
         test_file_type_detection()
         test_text_file_processing() 
+        test_text_file_encodings()
         test_pdf_extractor_class()
         test_unified_process_input()
         
@@ -3,6 +3,7 @@
 Test script to verify all performance optimizations work correctly.
 """
 
+import json
 import time
 import sys
 from pathlib import Path
@@ -55,6 +56,13 @@ def test_config_system():
         else:
             print("✅ Configuration validation passed")
         
+        # Test save/load round trip
+        Config(AI_BATCH_SIZE=4).save_to_file("test_config.json")
+        loaded = Config.load_from_file("test_config.json")
+        Path("test_config.json").unlink(missing_ok=True)
+        assert loaded.AI_BATCH_SIZE == 4
+        print(f"✅ Config round trip: AI_BATCH_SIZE = {loaded.AI_BATCH_SIZE}")
+        
         return True
         
     except Exception as e:
@@ -66,7 +74,7 @@ def test_patterns():
     print("\n📝 Testing regex patterns...")
     
     try:
-        from flashcard_generator.utils.patterns import TextPatterns, TextCleaner, FilePatterns
+        from flashcard_generator.utils.patterns import TextPatterns, TextCleaner, AIPatterns, FilePatterns
         
         # Test text cleaning patterns
         test_text = "<p>Hello  world!</p>"
@@ -78,9 +86,24 @@ def test_patterns():
         normalized = TextCleaner.normalize_whitespace(messy_text)
         print(f"✅ Whitespace normalization: '{messy_text}' → '{normalized}'")
         
+        # Test question recovery from malformed JSON
+        malformed = '["What is a cell?", "How do atoms bond?'
+        questions = AIPatterns.extract_questions(malformed)
+        assert questions == ["What is a cell?", "How do atoms bond?"], questions
+        print(f"✅ Question recovery: {malformed!r} → {questions}")
+        
+        # Test nested and bracket-containing arrays inside surrounding text
+        nested = 'Here: ["What is [x]?", ["Why?"]] done [ignored]'
+        span = AIPatterns.find_json_array(nested)
+        assert span == '["What is [x]?", ["Why?"]]', span
+        print(f"✅ JSON array scan: {nested!r} → {span!r}")
+        
         # Test file type detection
         print(f"✅ PDF detection: test.pdf → {FilePatterns.is_pdf_file('test.pdf')}")
         print(f"✅ Image detection: test.jpg → {FilePatterns.is_image_file('test.jpg')}")
+        assert FilePatterns.file_type('Notes.MD') == 'text'
+        assert FilePatterns.file_type('archive.tar.gz') == 'unknown'
+        print(f"✅ Suffix classification: Notes.MD → {FilePatterns.file_type('Notes.MD')}")
         
         return True
         
@@ -125,9 +148,32 @@ def test_storage_optimization():
         stats = storage.get_stats()
         print(f"✅ Storage stats: {stats}")
         
+        # Appending writes only the new cards after the existing ones
+        storage.save_flashcards([{"Question": "What is NLP?", "Answer": "Language processing"}])
+        questions = [card["Question"] for card in storage.load_flashcards()]
+        assert questions == ["What is AI?", "What is ML?", "What is DL?", "What is NLP?"], questions
+        print("✅ Append keeps existing cards")
+        
+        # A torn last line costs only its own card, not the next append
+        with open("test_cards.json", "ab") as f:
+            f.write(b'{"Question": "bad')
+        storage.save_flashcards([{"Question": "What is CV?", "Answer": "Computer vision"}])
+        questions = [card["Question"] for card in storage.load_flashcards()]
+        assert questions[-1] == "What is CV?" and len(questions) == 5, questions
+        print("✅ Append after a torn line keeps the new card")
+        
+        # A legacy JSON array next to a missing .jsonl file is migrated into it
+        Path("test_legacy.json").write_text(json.dumps(test_cards))
+        legacy_storage = FlashcardStorage("test_legacy.jsonl")
+        legacy_storage.save_flashcards([{"Question": "What is RL?", "Answer": "Reinforcement learning"}])
+        questions = [card["Question"] for card in legacy_storage.load_flashcards()]
+        assert questions == ["What is AI?", "What is ML?", "What is RL?"], questions
+        assert json.loads(Path("test_legacy.json").read_text()) == test_cards
+        print("✅ Legacy .json storage migrated to JSON Lines")
+        
         # Cleanup
-        Path("test_cards.json").unlink(missing_ok=True)
-        Path("test_cards.json.backup").unlink(missing_ok=True)
+        for name in ("test_cards.json", "test_legacy.json", "test_legacy.jsonl"):
+            Path(name).unlink(missing_ok=True)
         
         return True
         
@@ -135,6 +181,37 @@ def test_storage_optimization():
         print(f"❌ Storage test failed: {e}")
         return False
 
+def test_result_cache():
+    """Test the disk-backed result cache."""
+    print("\n🗃️ Testing result cache...")
+    
+    try:
+        import shutil
+        from flashcard_generator.utils.cache import ResultCache
+        
+        cache = ResultCache("test_result_cache")
+        key = cache.make_key("Some segment text", 3, "google/flan-t5-base")
+        
+        # Miss, then hit after storing
+        assert cache.get("flashcards", key) is None
+        cards = [{"Question": "What is AI?", "Answer": "Artificial Intelligence"}]
+        cache.set("flashcards", key, cards)
+        assert cache.get("flashcards", key) == cards
+        print(f"✅ Cache round trip for key {key}")
+        
+        # Different inputs produce different keys
+        assert key != cache.make_key("Some segment text", 4, "google/flan-t5-base")
+        print("✅ Cache keys depend on all inputs")
+        
+        # Cleanup
+        shutil.rmtree("test_result_cache", ignore_errors=True)
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Result cache test failed: {e}")
+        return False
+
 def test_model_manager():
     """Test the model manager (without actually loading heavy models)."""
     print("\n🤖 Testing model manager...")
@@ -240,6 +317,7 @@ def main():
         test_config_system,
         test_patterns,
         test_storage_optimization,
+        test_result_cache,
         test_model_manager,
         test_integration,
         run_performance_benchmark